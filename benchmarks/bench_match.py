@@ -0,0 +1,56 @@
+"""Server CPU cost per match tick, and how many matches one core can carry
+
+Each tick runs the simulation and delta-encodes a snapshot for every player,
+as GameServer does (minus the socket writes).
+
+Run from the project root:
+    python benchmarks/bench_match.py
+"""
+import os
+import sys
+import random
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game.input import INPUT_FIRE, INPUT_LEFT, INPUT_RIGHT
+from game.simulation import MatchSimulation
+from network.server import SNAPSHOT_INTERVAL, TICK_RATE
+from network.snapshot import SnapshotEncoder, make_snapshot
+
+def run(extra_enemies, ticks=1200, players=2, seed=0):
+    """Mean seconds per tick for a match with extra_enemies on top of the normal waves"""
+    rng = random.Random(seed)
+    match = MatchSimulation(players, seed=seed)
+    for slot in range(players):
+        match.add_player(slot)
+        match.players[slot].health = 10 ** 6  # Keep everyone playing for the whole run
+    match.spawn_enemies(extra_enemies)
+    encoders = [SnapshotEncoder() for _ in range(players)]
+    seqs = [0] * players
+    
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for slot in range(players):
+            seqs[slot] += 1
+            buttons = rng.choice((0, INPUT_LEFT, INPUT_RIGHT))
+            if rng.random() < 0.1:
+                buttons |= INPUT_FIRE
+            match.queue_inputs(slot, seqs[slot], [buttons])
+        match.step()
+        if match.tick % SNAPSHOT_INTERVAL == 0:
+            snapshot = make_snapshot(match.entities(), match.meta())
+            for encoder in encoders:
+                encoder.encode(match.tick, snapshot)
+                encoder.ack(match.tick)
+    return (time.perf_counter() - start) / ticks
+
+def main():
+    print(f"{'enemies':>8} {'us/tick':>9} {'core %':>7} {'matches/core':>13}")
+    for extra in (0, 20, 100, 500):
+        per_tick = run(extra)
+        load = per_tick * TICK_RATE  # Fraction of one core per match
+        print(f"{'+' + str(extra):>8} {per_tick * 1e6:>9.1f} {load * 100:>6.2f}% {int(1 / load):>13}")
+
+if __name__ == "__main__":
+    main()
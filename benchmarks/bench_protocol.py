@@ -0,0 +1,51 @@
+"""Compare the binary wire codec with JSON framing and the old bare json.dumps
+
+Run from the project root:
+    python benchmarks/bench_protocol.py
+"""
+import os
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from network.protocol import StreamDecoder, encode_binary, encode_json
+
+MESSAGES = {
+    'position': {'type': 'position', 'x': 412, 'y': 500},
+    'bullet': {'type': 'bullet', 'x': -1, 'y': -1},
+    'game_over': {'type': 'game_over'},
+    'state': {'type': 'state', 'x': 412, 'y': 500,
+              'events': [{'type': 'bullet', 'x': -1, 'y': -1}] * 3},
+}
+
+def rate(func, count):
+    """Calls per second of func over count calls"""
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return count / (time.perf_counter() - start)
+
+def main(count=100000):
+    print(f"{'message':>10} {'codec':>10} {'bytes':>6} {'encode/s':>12} {'decode/s':>12}")
+    for name, message in MESSAGES.items():
+        # The pre-framing format: bare JSON, one message per recv()
+        raw = json.dumps(message).encode('utf-8')
+        encode = rate(lambda: json.dumps(message).encode('utf-8'), count)
+        decode = rate(lambda: json.loads(raw.decode('utf-8')), count)
+        print(f"{name:>10} {'bare json':>10} {len(raw):>6} {encode:>12,.0f} {decode:>12,.0f}")
+        
+        for codec_name, codec in (('json', encode_json), ('binary', encode_binary)):
+            frame = codec(message)
+            decoder = StreamDecoder()
+            assert decoder.feed(frame) == [message]
+            
+            # Decode a coalesced batch, as a busy socket delivers it
+            batch = frame * 100
+            encode = rate(lambda: codec(message), count)
+            decode = rate(lambda: decoder.feed(batch), count // 100) * 100
+            print(f"{name:>10} {codec_name:>10} {len(frame):>6} {encode:>12,.0f} {decode:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
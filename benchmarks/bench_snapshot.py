@@ -0,0 +1,45 @@
+"""Per-client snapshot bandwidth as waves grow, full vs delta + zlib
+
+Run from the project root:
+    python benchmarks/bench_snapshot.py
+"""
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from network.snapshot import SnapshotDecoder, SnapshotEncoder, make_snapshot
+
+def simulate(count, ticks=120, ack_every=3, seed=0):
+    """Stream a wave of count enemies falling at game speed, returns (encoder, per-tick bytes)"""
+    rng = random.Random(seed)
+    entities = {i: [rng.uniform(0, 750), rng.uniform(-300, 600), rng.choice((2, 3, 3.5))]
+                for i in range(count)}
+    sizes = []
+    encoder = SnapshotEncoder(metrics=lambda m: sizes.append(m['bytes']))
+    decoder = SnapshotDecoder()
+
+    for tick in range(1, ticks + 1):
+        for entity in entities.values():
+            entity[1] += entity[2]
+            if entity[1] > 600:
+                entity[1] = rng.randint(-100, -40)
+        snapshot = make_snapshot({i: (0, x, y) for i, (x, y, _) in entities.items()},
+                                 {'score': tick // 10, 'level': 1})
+        decoded = decoder.decode(encoder.encode(tick, snapshot))
+        assert decoder.latest == snapshot
+        if decoded and tick % ack_every == 0:
+            encoder.ack(decoded)
+    return encoder, sizes
+
+def main():
+    print(f"{'enemies':>8} {'full B/tick':>12} {'sent B/tick':>12} {'ratio':>7} {'kB/s @60':>9}")
+    for count in (10, 50, 200, 1000):
+        encoder, sizes = simulate(count)
+        per_tick = sum(sizes) / len(sizes)
+        print(f"{count:>8} {encoder.full_bytes / encoder.packets:>12.0f} {per_tick:>12.0f} "
+              f"{encoder.compression_ratio():>6.1f}x {per_tick * 60 / 1024:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+"""Load test the multiplayer server with hundreds or thousands of simulated players
+
+Starts a GameServer in its own process on localhost, then connects headless
+bots to it from one or more worker processes. Bots are paired into rooms and
+speak the real protocol: hello/welcome, input or state packets at a steady
+rate with the occasional bullet, snapshot acks and pong replies.
+
+Latency is measured end to end. In a simulated match it is the time from
+sending an input to the server's state_ack for it; in relay mode (--relay)
+it is the time from one bot sending a state packet to its room partner
+receiving it.
+
+Run from the project root:
+    python benchmarks/load_bots.py --bots 500 --duration 30
+    python benchmarks/load_bots.py --bots 2000 --workers 4 --relay --json load.json
+"""
+import os
+import sys
+import argparse
+import asyncio
+import json
+import multiprocessing
+import queue
+import random
+import time
+import urllib.request
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game.input import INPUT_FIRE, INPUT_LEFT, INPUT_RIGHT
+from network.protocol import PROTOCOL_VERSION, CODECS, StreamDecoder, encode_json
+from network.server import ROOM_SIZE, GameServer
+from network.snapshot import SnapshotDecoder
+
+CONNECT_TIMEOUT = 5.0  # seconds to get connected and welcomed
+MAX_IN_FLIGHT = 256  # Sent sequence numbers remembered per bot while awaiting an answer
+SERVER_START_TIMEOUT = 10.0
+LINGER = 1.0  # seconds bots stay connected after the window, so the last server sample sees them
+WORKER_TIMEOUT = 60.0  # seconds to wait for results after the run should have ended
+ERROR_KINDS = ('connect', 'rejected', 'disconnected', 'send', 'server_error', 'malformed')
+
+def raise_file_limit():
+    """Allow as many open sockets as the hard limit does"""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+def percentile(values, fraction):
+    """The value at fraction (0-1) of a sorted list, or None when it's empty"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+class Bot:
+    """One simulated player: moves back and forth, fires now and then"""
+    def __init__(self, room, rate, bullet_rate, seed, measure_start, measure_end):
+        self.room = room
+        self.rate = rate  # Packets per second
+        self.bullet_rate = bullet_rate  # Bullets per second
+        self.rng = random.Random(seed)
+        self.measure_start = measure_start  # Loop times between which traffic is counted
+        self.measure_end = measure_end
+        self.partner = None  # The other bot in the room (relay latency)
+        
+        self.writer = None
+        self.encode = encode_json
+        self.decoder = StreamDecoder()
+        self.snapshots = SnapshotDecoder()
+        self.authoritative = False
+        self.closing = False
+        self.connected = False
+        
+        self.x = self.rng.randint(100, 700)
+        self.direction = self.rng.choice((-1, 0, 1))
+        self.seq = 0
+        self.sent = {}  # seq -> loop time sent, oldest first
+        
+        # Counters, measurement window only
+        self.latencies = []  # seconds
+        self.messages_out = 0
+        self.messages_in = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.errors = dict.fromkeys(ERROR_KINDS, 0)
+    
+    def measuring(self):
+        return self.measure_start <= asyncio.get_running_loop().time() < self.measure_end
+    
+    def send(self, message):
+        data = self.encode(message)
+        self.writer.write(data)
+        if self.measuring():
+            self.messages_out += 1
+            self.bytes_out += len(data)
+    
+    async def run(self, host, port, delay, end):
+        """Connect after delay and play until loop time end"""
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(delay)
+        try:
+            reader, self.writer = await asyncio.wait_for(asyncio.open_connection(host, port),
+                                                         CONNECT_TIMEOUT)
+            self.writer.write(encode_json({
+                'type': 'hello',
+                'version': PROTOCOL_VERSION,
+                'codecs': list(CODECS),
+                'room': self.room
+            }))
+            welcome = await asyncio.wait_for(self._welcome(reader), CONNECT_TIMEOUT)
+        except (OSError, asyncio.TimeoutError):
+            self.errors['connect'] += 1
+            self._close()
+            return
+        if welcome is None or welcome.get('type') != 'welcome':
+            self.errors['rejected'] += 1
+            self._close()
+            return
+        
+        self.connected = True
+        self.authoritative = welcome.get('simulated', False)
+        self.encode = CODECS[welcome.get('codec', 'json')]
+        receiver = loop.create_task(self._receive(reader))
+        interval = 1.0 / self.rate
+        next_send = loop.time() + self.rng.random() * interval  # Don't all send at once
+        try:
+            while loop.time() < end and not self.writer.is_closing():
+                await asyncio.sleep(max(0.0, next_send - loop.time()))
+                next_send += interval
+                self._send_tick(loop.time())
+                await self.writer.drain()
+        except (OSError, RuntimeError):
+            self.errors['send'] += 1
+        finally:
+            self.closing = True
+            if not self.writer.is_closing():
+                try:
+                    self.send({'type': 'disconnect'})
+                except (OSError, RuntimeError):
+                    pass
+            self._close()
+            receiver.cancel()
+            self.errors['malformed'] += self.decoder.malformed
+    
+    async def _welcome(self, reader):
+        """Read until the welcome (or refusal) arrives, None if the server hung up"""
+        while True:
+            data = await reader.read(4096)
+            if not data:
+                return None
+            for message in self.decoder.feed(data):
+                if message.get('type') in ('welcome', 'error'):
+                    return message
+    
+    def _send_tick(self, now):
+        """Move a step and send this tick's input or state packet"""
+        if self.rng.random() < 0.05:
+            self.direction = self.rng.choice((-1, 0, 1))
+        self.x = max(32, min(768, self.x + self.direction * 7))
+        fire = self.rng.random() < self.bullet_rate / self.rate
+        
+        self.seq = (self.seq + 1) & 0xFFFF
+        self.sent[self.seq] = now
+        if len(self.sent) > MAX_IN_FLIGHT:
+            del self.sent[next(iter(self.sent))]
+        
+        if self.authoritative:
+            buttons = {-1: INPUT_LEFT, 0: 0, 1: INPUT_RIGHT}[self.direction]
+            if fire:
+                buttons |= INPUT_FIRE
+            self.send({'type': 'input', 'seq': self.seq, 'inputs': [buttons]})
+        else:
+            events = [{'type': 'bullet', 'x': self.x, 'y': 468}] if fire else []
+            self.send({'type': 'state', 'seq': self.seq, 'x': self.x, 'y': 500,
+                       'events': events})
+    
+    def _record_latency(self, sent, seq):
+        sent_time = sent.pop(seq, None)
+        if sent_time is not None and self.measuring():
+            self.latencies.append(asyncio.get_running_loop().time() - sent_time)
+    
+    async def _receive(self, reader):
+        while True:
+            try:
+                data = await reader.read(65536)
+            except OSError:
+                data = b''
+            if not data:
+                if not self.closing:
+                    self.errors['disconnected'] += 1
+                    self.connected = False
+                return
+            
+            messages = self.decoder.feed(data)
+            if self.measuring():
+                self.messages_in += len(messages)
+                self.bytes_in += len(data)
+            for message in messages:
+                msg_type = message.get('type')
+                if msg_type == 'state_ack':
+                    self._record_latency(self.sent, message.get('seq'))
+                elif msg_type == 'state':
+                    if self.partner and 'seq' in message:
+                        self._record_latency(self.partner.sent, message['seq'])
+                elif msg_type == 'snapshot':
+                    tick = self.snapshots.decode(message.get('data', b''))
+                    if tick is not None:
+                        self.send({'type': 'snapshot_ack', 'tick': tick})
+                elif msg_type == 'ping':
+                    self.send({'type': 'pong', 't': message.get('t')})
+                elif msg_type == 'error':
+                    self.errors['server_error'] += 1
+    
+    def _close(self):
+        if self.writer and not self.writer.is_closing():
+            self.writer.close()
+
+async def run_bots(worker, count, args, start_time):
+    """Run count bots in this process, returns their combined counters
+
+    start_time is the wall clock time the run began, so every worker (and the
+    server samples taken by the parent) share one measurement window.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time() + start_time - time.time()
+    measure_start = start + args.ramp
+    measure_end = measure_start + args.duration
+    end = measure_end + LINGER
+    
+    bots = []
+    for i in range(count):
+        room = f'load-{worker}-{i // ROOM_SIZE}'
+        bots.append(Bot(room, args.rate, args.bullet_rate, worker * 100003 + i,
+                        measure_start, measure_end))
+        if i % ROOM_SIZE:
+            bots[-1].partner = bots[-2]
+            bots[-2].partner = bots[-1]
+    
+    # Spread the connects over the ramp-up, leaving a moment for the last ones to settle
+    spacing = args.ramp * 0.8 / max(1, count)
+    await asyncio.gather(*(bot.run(args.host, args.port, start + i * spacing - loop.time(), end)
+                           for i, bot in enumerate(bots)))
+    
+    result = {
+        'connected': sum(1 for bot in bots if bot.connected),
+        'messages_out': sum(bot.messages_out for bot in bots),
+        'messages_in': sum(bot.messages_in for bot in bots),
+        'bytes_out': sum(bot.bytes_out for bot in bots),
+        'bytes_in': sum(bot.bytes_in for bot in bots),
+        'errors': {kind: sum(bot.errors[kind] for bot in bots) for kind in ERROR_KINDS},
+        'latencies': [latency for bot in bots for latency in bot.latencies]
+    }
+    return result
+
+def worker_main(worker, count, args, start_time, results):
+    raise_file_limit()
+    results.put(asyncio.run(run_bots(worker, count, args, start_time)))
+
+def server_main(port, stats_port, simulate):
+    """Run a quiet GameServer until the process is terminated"""
+    raise_file_limit()
+    sys.stdout = open(os.devnull, 'w')  # One line per join/leave otherwise
+    GameServer(host='127.0.0.1', port=port, udp=False, simulate=simulate,
+               stats_port=stats_port).start()
+
+def fetch_server_stats(stats_port):
+    """The server's get_stats() over its stats endpoint, or None if unreachable"""
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{stats_port}/', timeout=10) as response:
+            return json.loads(response.read())
+    except (OSError, ValueError):
+        return None
+
+def wait_for_server(stats_port, timeout=SERVER_START_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if fetch_server_stats(stats_port) is not None:
+            return True
+        time.sleep(0.1)
+    return False
+
+def server_summary(before, after, elapsed):
+    """Server side throughput over the measurement window from two stats samples"""
+    if not before or not after:
+        return None
+    traffic_before, traffic_after = before['traffic'], after['traffic']
+    summary = {'players': after['player_count'], 'rooms': after['room_count']}
+    for name in ('messages_in', 'messages_out', 'bytes_in', 'bytes_out'):
+        summary[f'{name}_rate'] = round((traffic_after[name] - traffic_before[name]) / elapsed, 1)
+    for name in ('dropped', 'malformed', 'queue_bytes', 'rtt_ms_median', 'rtt_ms_max'):
+        summary[name] = traffic_after[name]
+    if 'sim_load' in after:
+        summary['sim_load'] = after['sim_load']
+        summary['max_tick_ms'] = max((room.get('max_tick_ms', 0)
+                                      for room in after['rooms'].values()), default=0)
+    return summary
+
+def run(args):
+    """Start the server and the bot workers, and collect the results"""
+    server = None
+    if not args.no_server:
+        server = multiprocessing.Process(target=server_main,
+                                         args=(args.port, args.stats_port, not args.relay),
+                                         daemon=True)
+        server.start()
+        if not wait_for_server(args.stats_port):
+            server.terminate()
+            raise SystemExit("Server didn't start")
+    
+    try:
+        workers = max(1, min(args.workers, args.bots // ROOM_SIZE))
+        # Whole rooms per worker so partners share a clock
+        rooms = -(-args.bots // ROOM_SIZE)
+        counts = [(rooms * (i + 1) // workers - rooms * i // workers) * ROOM_SIZE
+                  for i in range(workers)]
+        counts[-1] -= sum(counts) - args.bots
+        
+        results = multiprocessing.Queue()
+        start_time = time.time()
+        processes = [multiprocessing.Process(target=worker_main,
+                                             args=(i, count, args, start_time, results),
+                                             daemon=True)
+                     for i, count in enumerate(counts)]
+        for process in processes:
+            process.start()
+        
+        # Sample the server around the measurement window
+        time.sleep(max(0.0, start_time + args.ramp - time.time()))
+        before = fetch_server_stats(args.stats_port)
+        start = time.monotonic()
+        time.sleep(max(0.0, start_time + args.ramp + args.duration - time.time()))
+        after = fetch_server_stats(args.stats_port)
+        elapsed = time.monotonic() - start
+        
+        try:
+            parts = [results.get(timeout=WORKER_TIMEOUT) for _ in processes]
+        except queue.Empty:
+            raise SystemExit("A bot worker failed, see its traceback above")
+        for process in processes:
+            process.join()
+    finally:
+        if server:
+            server.terminate()
+            server.join()
+    
+    latencies = sorted(latency for part in parts for latency in part['latencies'])
+    errors = {kind: sum(part['errors'][kind] for part in parts) for kind in ERROR_KINDS}
+    total = {name: sum(part[name] for part in parts)
+             for name in ('connected', 'messages_out', 'messages_in', 'bytes_out', 'bytes_in')}
+    return {
+        'bots': args.bots,
+        'workers': workers,
+        'mode': 'relay' if args.relay else 'simulated',
+        'duration': args.duration,
+        'connected': total['connected'],
+        'messages_out_rate': round(total['messages_out'] / args.duration, 1),
+        'messages_in_rate': round(total['messages_in'] / args.duration, 1),
+        'bytes_out_rate': round(total['bytes_out'] / args.duration),
+        'bytes_in_rate': round(total['bytes_in'] / args.duration),
+        'latency_samples': len(latencies),
+        'latency_ms': {name: round(percentile(latencies, fraction) * 1000, 2) if latencies else None
+                       for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99),
+                                              ('max', 1.0))},
+        'errors': errors,
+        'error_rate': round(sum(errors.values()) / args.bots, 4),
+        'server': server_summary(before, after, elapsed)
+    }
+
+def report(result):
+    latency = result['latency_ms']
+    print(f"{result['connected']}/{result['bots']} bots connected "
+          f"({result['mode']} mode, {result['workers']} worker processes, {result['duration']}s)")
+    print(f"Bots sent      {result['messages_out_rate']:>10,.0f} msg/s "
+          f"{result['bytes_out_rate'] / 1024:>9.1f} kB/s")
+    print(f"Bots received  {result['messages_in_rate']:>10,.0f} msg/s "
+          f"{result['bytes_in_rate'] / 1024:>9.1f} kB/s")
+    if result['latency_samples']:
+        print(f"Latency (ms)   p50 {latency['p50']:.2f}  p95 {latency['p95']:.2f}  "
+              f"p99 {latency['p99']:.2f}  max {latency['max']:.2f}  "
+              f"({result['latency_samples']:,} samples)")
+    errors = ', '.join(f'{kind} {count}' for kind, count in result['errors'].items())
+    print(f"Errors         {errors} (rate {result['error_rate']:.2%} per bot)")
+    
+    server = result['server']
+    if server:
+        print(f"Server         {server['players']} players in {server['rooms']} rooms, "
+              f"in {server['messages_in_rate']:,.0f} msg/s, "
+              f"out {server['messages_out_rate']:,.0f} msg/s "
+              f"({server['bytes_out_rate'] / 1024:.1f} kB/s), dropped {server['dropped']}")
+        if 'sim_load' in server:
+            print(f"Matches        {server['sim_load']:.1%} of a core, "
+                  f"slowest tick {server['max_tick_ms']:.2f} ms")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the multiplayer server with bots")
+    parser.add_argument('--bots', type=int, default=200, help="simulated players (default 200)")
+    parser.add_argument('--duration', type=float, default=20.0,
+                        help="seconds measured after ramp-up (default 20)")
+    parser.add_argument('--ramp', type=float, default=5.0,
+                        help="seconds to connect all bots over (default 5)")
+    parser.add_argument('--rate', type=float, default=30.0,
+                        help="packets per second per bot (default 30, the client's send rate)")
+    parser.add_argument('--bullet-rate', type=float, default=2.0,
+                        help="bullets per second per bot (default 2)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="bot processes (default one per CPU)")
+    parser.add_argument('--relay', action='store_true',
+                        help="relay mode server instead of server-run matches")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5556)
+    parser.add_argument('--stats-port', type=int, default=5557)
+    parser.add_argument('--no-server', action='store_true',
+                        help="use a server already running on localhost (with stats_port)")
+    parser.add_argument('--json', metavar='PATH', help="also write the results here")
+    args = parser.parse_args(argv)
+    if args.host not in ('127.0.0.1', 'localhost', '::1'):
+        parser.error("load tests only run against localhost")
+    
+    raise_file_limit()
+    result = run(args)
+    report(result)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
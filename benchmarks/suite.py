@@ -0,0 +1,360 @@
+"""Benchmark suite for the game and network hot paths, with regression checks
+
+Covers Game.update and Game.render at several entity counts, collision
+checks, sprite construction and pooling, the NumPy entity store at 10k+
+entities, the wire and snapshot codecs, and loopback relay throughput through
+a real GameServer. Everything runs under
+the dummy SDL driver. Results are written as JSON; --compare checks them
+against a stored run and exits with status 1 if anything got slower by more
+than the threshold.
+
+Run from the project root:
+    python benchmarks/suite.py --output baseline.json
+    python benchmarks/suite.py --compare baseline.json
+    python benchmarks/suite.py --only update,render --quick
+"""
+import os
+import sys
+import argparse
+import json
+import platform
+import socket
+import threading
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pygame
+from pygame.locals import K_LEFT, K_SPACE
+
+from bench_collision import time_call
+from bench_protocol import MESSAGES
+from game.bullet import Bullet
+from game.collision import groupcollide
+from game.enemy import Enemy
+from game.entity_store import ENEMY, EntityStore
+from game.game import Game
+from game.pool import SpritePool
+from game.renderer import DirtyRectRenderer
+from network.client import GameClient
+from network.protocol import StreamDecoder, encode_binary, encode_json
+from network.server import GameServer
+from network.snapshot import SnapshotDecoder, SnapshotEncoder, make_snapshot
+
+DEFAULT_THRESHOLD = 0.15  # Relative slowdown that counts as a regression
+RELAY_TIMEOUT = 10.0  # seconds to wait for relayed messages to arrive
+
+# Units where a smaller number is better; everything else is a rate
+SMALLER_IS_BETTER = ('us', 'ms', 'B')
+
+def best_of(repeat, func):
+    """Smallest result of repeat calls, the least disturbed by everything else running"""
+    return min(func() for _ in range(repeat))
+
+def per_call(func, count):
+    """Mean microseconds per call of func over count calls"""
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - start) / count * 1e6
+
+def best_rate(repeat, func, count):
+    """Best calls per second of func over repeat runs of count calls"""
+    return 1e6 / best_of(repeat, lambda: per_call(func, count))
+
+def make_game(enemies):
+    """A headless game with about enemies on screen and an unkillable player"""
+    game = Game(headless=True, seed=0, enemy_pool_size=max(64, enemies))
+    game.player.health = game.player.max_health = 10 ** 6
+    game.spawn_enemies(max(0, enemies - len(game.enemies)))
+    for enemy in game.enemies:
+        enemy.rect.y = game.rng.randint(0, game.height - 100)  # On screen, not queued above it
+    return game
+
+def bench_update(scale):
+    """Microseconds per Game.step at each entity count"""
+    results = {}
+    for count in (10, 100, 500):
+        def run():
+            game = make_game(count)
+            game.set_held_keys({K_LEFT})
+            ticks = int(300 * scale)
+            start = time.perf_counter()
+            for tick in range(ticks):
+                if tick % 6 == 0:
+                    game.press_key(K_SPACE)
+                game.step()
+            return (time.perf_counter() - start) / ticks * 1e6
+        results[f'update.enemies_{count}'] = (best_of(3, run), 'us')
+    return results
+
+def bench_render(scale):
+    """Microseconds per Game.render, full redraw and dirty rectangles"""
+    results = {}
+    for count in (10, 100, 500):
+        game = make_game(count)
+        frames = int(200 * scale)
+        results[f'render.full.enemies_{count}'] = (
+            best_of(3, lambda: per_call(game.render, frames)), 'us')
+        
+        # Sprites move between frames, so the dirty rectangles have something to do
+        game.renderer = DirtyRectRenderer(game.screen, game.background)
+        def moving():
+            elapsed = 0.0
+            for _ in range(frames):
+                game.step()
+                start = time.perf_counter()
+                game.render()
+                elapsed += time.perf_counter() - start
+            return elapsed / frames * 1e6
+        results[f'render.dirty.enemies_{count}'] = (best_of(3, moving), 'us')
+    return results
+
+def bench_collision(scale):
+    """Milliseconds per bullet/enemy check, pygame's groupcollide against the spatial hash"""
+    results = {}
+    for count in (100, 1000, 5000):
+        repeat = max(3, int(10 * scale))
+        results[f'collision.pygame.entities_{count}'] = (
+            time_call(pygame.sprite.groupcollide, count, repeat), 'ms')
+        results[f'collision.hash.entities_{count}'] = (time_call(groupcollide, count, repeat), 'ms')
+    return results
+
+def bench_sprites(scale):
+    """Microseconds to construct sprites, and to recycle them through a pool"""
+    count = int(5000 * scale)
+    pool = SpritePool(Enemy, 64)
+    def recycle():
+        pool.acquire(100, 100, 3).kill()
+    return {
+        'sprites.enemy_new': (best_of(3, lambda: per_call(lambda: Enemy(100, 100, 3), count)),
+                              'us'),
+        'sprites.bullet_new': (best_of(3, lambda: per_call(lambda: Bullet(100, 100), count)),
+                               'us'),
+        'sprites.enemy_pooled': (best_of(3, lambda: per_call(recycle, count)), 'us'),
+    }
+
+def fill_store(count):
+    """An EntityStore with count enemies spread over and just above the screen"""
+    store = EntityStore(count, seed=0)
+    rng = store.rng
+    store.spawn_many(ENEMY, rng.random(count) * 788, rng.random(count) * 700 - 100, 0,
+                     rng.uniform(0.5, 3.0, count), 12, 12, wrap=True)
+    return store
+
+def bench_entities(scale):
+    """Microseconds per tick moving 10k+ entities in the array store, against sprite groups"""
+    results = {}
+    ticks = int(200 * scale)
+    screen = pygame.Surface((800, 600))
+    images = {ENEMY: pygame.transform.smoothscale(Enemy(0, 0, 0).image, (12, 12))}
+    for count in (10000, 50000):
+        store = fill_store(count)
+        results[f'entities.store.update.entities_{count}'] = (
+            best_of(3, lambda: per_call(store.update, ticks)), 'us')
+        results[f'entities.store.draw.entities_{count}'] = (
+            best_of(3, lambda: per_call(lambda: store.draw(screen, images), max(1, ticks // 10))),
+            'us')
+    
+    # Spawning into freed slots one at a time, as a game does
+    store = fill_store(10000)
+    rng = store.rng
+    def respawn():
+        slot = int(rng.integers(0, 10000))
+        store.kill(slot)
+        store.spawn(ENEMY, 100, 100, 0, 1, 12, 12, wrap=True)
+    results['entities.store.respawn.entities_10000'] = (
+        best_of(3, lambda: per_call(respawn, ticks * 10)), 'us')
+    results['entities.store.bytes_per_entity'] = (store.bytes_per_entity(), 'B')
+    
+    # The same wave as sprites, for scale
+    group = pygame.sprite.Group(Enemy(i % 750, i % 600, 2) for i in range(10000))
+    results['entities.sprites.update.entities_10000'] = (
+        best_of(3, lambda: per_call(lambda: group.update(600), max(1, ticks // 10))), 'us')
+    
+    # A whole game tick and frame with a 10k swarm behind it
+    game = Game(headless=True, seed=0, swarm=10000)
+    def frame():
+        game.step()
+        game.render()
+    results['entities.game.swarm_10000'] = (best_of(3, lambda: per_call(frame, ticks)), 'us')
+    return results
+
+def bench_codec(scale):
+    """Messages per second through each wire codec, and snapshot encode/decode cost"""
+    count = int(50000 * scale)
+    results = {}
+    message = MESSAGES['state']
+    for name, codec in (('binary', encode_binary), ('json', encode_json)):
+        # Decoding a coalesced batch, as a busy socket delivers it
+        batch = codec(message) * 100
+        decoder = StreamDecoder()
+        results[f'codec.{name}.encode'] = (best_rate(3, lambda: codec(message), count), 'msg/s')
+        results[f'codec.{name}.decode'] = (
+            best_rate(3, lambda: decoder.feed(batch), count // 100) * 100, 'msg/s')
+    
+    # A 200 entity world, half of it moving each tick
+    entities = {i: (1, i * 3, i * 2) for i in range(16, 216)}
+    ticks = int(500 * scale)
+    def stream():
+        encoder = SnapshotEncoder()
+        decoder = SnapshotDecoder()
+        start = time.perf_counter()
+        for tick in range(1, ticks + 1):
+            for i in range(16 + tick % 2, 216, 2):
+                kind, x, y = entities[i]
+                entities[i] = (kind, x, y + 1)
+            packet = encoder.encode(tick, make_snapshot(entities))
+            encoder.ack(decoder.decode(packet))
+        return (time.perf_counter() - start) / ticks * 1e6
+    results['codec.snapshot.entities_200'] = (best_of(3, stream), 'us')
+    return results
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def bench_relay(scale):
+    """Messages per second relayed from one GameClient to another through GameServer"""
+    port = free_port()
+    server = GameServer(host='127.0.0.1', port=port, udp=False, simulate=False)
+    thread = threading.Thread(target=server.start, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not server.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    
+    clients = []
+    try:
+        for _ in range(2):
+            client = GameClient('127.0.0.1', room='bench')
+            client.port = port
+            if not client.connect():
+                raise RuntimeError("Couldn't connect to the benchmark server")
+            clients.append(client)
+        sender, receiver = clients
+        
+        count = int(20000 * scale)
+        received = receiver.stats.messages_in
+        start = time.perf_counter()
+        for seq in range(count):
+            sender.send_message({'type': 'state', 'seq': seq & 0xFFFF, 'x': seq % 800, 'y': 500,
+                                 'events': []})
+        
+        # Wait for the last one, or until messages stop arriving (dropped on the way)
+        last_count, last_change = received, time.perf_counter()
+        while receiver.stats.messages_in - received < count:
+            time.sleep(0.001)
+            now = time.perf_counter()
+            if receiver.stats.messages_in != last_count:
+                last_count, last_change = receiver.stats.messages_in, now
+            elif now - last_change > 1.0 or now - start > RELAY_TIMEOUT:
+                break
+        elapsed = time.perf_counter() - start
+        delivered = receiver.stats.messages_in - received
+        return {
+            'relay.tcp.throughput': (delivered / elapsed, 'msg/s'),
+            'relay.tcp.delivered': (delivered / count * 100, '%'),
+        }
+    finally:
+        for client in clients:
+            client.disconnect()
+        server.stop()
+        thread.join(timeout=5)
+
+BENCHMARKS = {
+    'update': bench_update,
+    'render': bench_render,
+    'collision': bench_collision,
+    'sprites': bench_sprites,
+    'entities': bench_entities,
+    'codec': bench_codec,
+    'relay': bench_relay,
+}
+
+def run(names, scale=1.0):
+    """Run the named groups, returns {metric: {'value': ..., 'unit': ...}}"""
+    results = {}
+    for name in names:
+        start = time.perf_counter()
+        for metric, (value, unit) in BENCHMARKS[name](scale).items():
+            results[metric] = {'value': round(value, 4), 'unit': unit}
+        print(f"{name} done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return results
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Rows of (metric, baseline, current, change, regressed) for metrics in both runs
+
+    change is the relative slowdown: positive when worse, whichever way the unit goes.
+    """
+    rows = []
+    for metric, current in results.items():
+        previous = baseline.get(metric)
+        if previous is None or not previous['value'] or previous['unit'] != current['unit']:
+            continue
+        ratio = current['value'] / previous['value']
+        change = ratio - 1 if current['unit'] in SMALLER_IS_BETTER else 1 / ratio - 1 if ratio else 1.0
+        rows.append((metric, previous['value'], current['value'], change, change > threshold))
+    return rows
+
+def report(results, rows=None):
+    if rows is None:
+        for metric, result in results.items():
+            print(f"{metric:<36} {result['value']:>14,.3f} {result['unit']}")
+        return
+    
+    print(f"{'metric':<36} {'baseline':>14} {'current':>14} {'slower':>8}")
+    for metric, previous, current, change, regressed in rows:
+        unit = results[metric]['unit']
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{metric:<36} {previous:>14,.3f} {current:>14,.3f} {change:>+7.1%} {unit}{flag}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument('--output', '-o', metavar='PATH', help="write the results here as JSON")
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help="compare with a previous --output file, exit 1 on regressions")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"relative slowdown that counts as a regression "
+                             f"(default {DEFAULT_THRESHOLD})")
+    parser.add_argument('--only', help="comma-separated groups: " + ','.join(BENCHMARKS))
+    parser.add_argument('--quick', action='store_true', help="fewer iterations, noisier numbers")
+    args = parser.parse_args(argv)
+    
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark group {', '.join(unknown)}")
+    
+    pygame.display.init()
+    results = run(names, 0.2 if args.quick else 1.0)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'pygame': pygame.version.ver,
+                'platform': platform.platform(),
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'results': results
+            }, f, indent=2)
+    
+    if not args.compare:
+        report(results)
+        return 0
+    with open(args.compare) as f:
+        baseline = json.load(f)['results']
+    rows = compare(results, baseline, args.threshold)
+    report(results, rows)
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    print(f"No regressions beyond {args.threshold:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
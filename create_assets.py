@@ -1,71 +1,106 @@
+"""Generate the game's placeholder images
+
+Each asset is keyed by a hash of its generator's parameters and source code,
+stored in assets/.manifest.json, so a run where nothing changed only reads
+the manifest and exits. Stale assets are generated in parallel.
+
+    python create_assets.py          # Generate missing or out of date assets
+    python create_assets.py --force  # Regenerate everything
+"""
+import hashlib
+import inspect
+import json
 import os
-from PIL import Image, ImageDraw, ImageFilter
+import sys
+
+# PIL and NumPy are only imported by the generators, so the nothing-to-do
+# path stays instant
+
+MANIFEST_PATH = "assets/.manifest.json"
 
 def create_directories():
     """Create required directories"""
     os.makedirs("assets/images", exist_ok=True)
     os.makedirs("assets/sounds", exist_ok=True)
-    
-def create_menu_bg():
+
+def create_menu_bg(path, size=(800, 600), color=(30, 50, 100), stars=100, glow=20, blur=1):
     """Create a basic menu background"""
-    img = Image.new('RGB', (800, 600), color=(30, 50, 100))
+    from PIL import Image, ImageDraw, ImageFilter
+    width, height = size
+    img = Image.new('RGB', size, color=color)
     draw = ImageDraw.Draw(img)
     
     # Draw some stars
-    for i in range(100):
-        x = (i * 17) % 800
-        y = (i * 23) % 600
-        size = (i % 3) + 1
-        draw.rectangle((x, y, x+size, y+size), fill=(255, 255, 255))
+    for i in range(stars):
+        x = (i * 17) % width
+        y = (i * 23) % height
+        star = (i % 3) + 1
+        draw.rectangle((x, y, x+star, y+star), fill=(255, 255, 255))
     
-    # Add a gradient
-    for y in range(600):
-        for x in range(800):
-            r, g, b = img.getpixel((x, y))
-            factor = 1 - (y / 800)
-            img.putpixel((x, y), (int(r + 20 * factor), int(g + 20 * factor), int(b)))
+    # Add a gradient: red and green brighten towards the top, by glow at row 0
+    rows = [int(glow * (1 - y / 800)) for y in range(height)]
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None:
+        pixels = np.asarray(img, dtype=np.int16).copy()
+        pixels[:, :, :2] += np.array(rows, dtype=np.int16)[:, None, None]
+        img = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), 'RGB')
+    else:
+        # Same thing with a one-column image stretched across and added per channel
+        from PIL import ImageChops
+        gradient = Image.new('L', (1, height))
+        gradient.putdata(rows)
+        gradient = gradient.resize(size)
+        r, g, b = img.split()
+        img = Image.merge('RGB', (ImageChops.add(r, gradient), ImageChops.add(g, gradient), b))
     
-    img = img.filter(ImageFilter.GaussianBlur(radius=1))
-    img.save("assets/images/menu_bg.jpg")
-    
-def create_sky_bg():
+    img = img.filter(ImageFilter.GaussianBlur(radius=blur))
+    img.save(path)
+
+def create_sky_bg(path, size=(800, 600), color=(100, 150, 255), clouds=5):
     """Create a basic game background"""
-    img = Image.new('RGB', (800, 600), color=(100, 150, 255))
+    from PIL import Image, ImageDraw
+    img = Image.new('RGB', size, color=color)
     draw = ImageDraw.Draw(img)
     
     # Add some clouds
-    for i in range(5):
-        x = (i * 160) % 800
+    for i in range(clouds):
+        x = (i * 160) % size[0]
         y = (i * 100) % 200
         draw.ellipse((x, y, x+120, y+60), fill=(255, 255, 255, 180))
         draw.ellipse((x+40, y-20, x+160, y+40), fill=(255, 255, 255, 180))
     
-    img.save("assets/images/sky_bg.jpg")
-    
-def create_player():
+    img.save(path)
+
+def create_player(path, size=(64, 64), color=(0, 128, 255)):
     """Create basic player ship image"""
-    img = Image.new('RGBA', (64, 64), color=(0, 0, 0, 0))
+    from PIL import Image, ImageDraw
+    img = Image.new('RGBA', size, color=(0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
     
     # Draw triangular ship
-    draw.polygon([(32, 10), (10, 50), (54, 50)], fill=(0, 128, 255))
+    draw.polygon([(32, 10), (10, 50), (54, 50)], fill=color)
     draw.rectangle((22, 30, 42, 45), fill=(100, 100, 100))
     
-    img.save("assets/images/player.png")
-    
-def create_enemy():
+    img.save(path)
+
+def create_enemy(path, size=(50, 50), color=(255, 50, 50)):
     """Create basic enemy ship image"""
-    img = Image.new('RGBA', (50, 50), color=(0, 0, 0, 0))
+    from PIL import Image, ImageDraw
+    img = Image.new('RGBA', size, color=(0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
     
     # Draw triangular enemy
-    draw.polygon([(5, 5), (45, 5), (25, 45)], fill=(255, 50, 50))
+    draw.polygon([(5, 5), (45, 5), (25, 45)], fill=color)
     
-    img.save("assets/images/enemy.png")
+    img.save(path)
 
-def create_cloud():
+def create_cloud(path, size=(100, 60)):
     """Create basic cloud image"""
-    img = Image.new('RGBA', (100, 60), color=(0, 0, 0, 0))
+    from PIL import Image, ImageDraw
+    img = Image.new('RGBA', size, color=(0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
     
     # Draw cloud from overlapping ellipses
@@ -73,13 +108,70 @@ def create_cloud():
     draw.ellipse((30, 10, 80, 50), fill=(255, 255, 255, 180))
     draw.ellipse((60, 20, 100, 40), fill=(255, 255, 255, 180))
     
-    img.save("assets/images/cloud.png")
+    img.save(path)
 
-if __name__ == "__main__":
+# output path -> (generator, parameters)
+ASSETS = {
+    "assets/images/menu_bg.jpg": (create_menu_bg, {}),
+    "assets/images/sky_bg.jpg": (create_sky_bg, {}),
+    "assets/images/player.png": (create_player, {}),
+    "assets/images/enemy.png": (create_enemy, {}),
+    "assets/images/cloud.png": (create_cloud, {}),
+}
+
+def asset_key(path, generator, params):
+    """Hash of everything that decides an asset's content"""
+    source = inspect.getsource(generator)
+    data = json.dumps([path, generator.__name__, params, source], sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(manifest):
+    temp_path = MANIFEST_PATH + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, MANIFEST_PATH)
+
+def generate(job):
+    """Run one generator (in a worker process)"""
+    path, generator, params = job
+    generator(path, **params)
+    return path
+
+def create_assets(force=False, workers=None):
+    """Generate the assets that are missing or out of date, returns (generated, skipped)"""
     create_directories()
-    create_menu_bg()
-    create_sky_bg()
-    create_player()
-    create_enemy()
-    create_cloud()
-    print("Basic assets created!")
+    manifest = load_manifest()
+    keys = {path: asset_key(path, generator, params)
+            for path, (generator, params) in ASSETS.items()}
+    stale = [path for path in ASSETS
+             if force or manifest.get(path) != keys[path] or not os.path.exists(path)]
+    if not stale:
+        return [], list(ASSETS)
+    
+    jobs = [(path,) + ASSETS[path] for path in stale]
+    if len(jobs) == 1 or workers == 1:
+        done = [generate(job) for job in jobs]
+    else:
+        # A pool only pays off once there's more than one image to make
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            done = list(pool.map(generate, jobs))
+    
+    for path in done:
+        manifest[path] = keys[path]
+    save_manifest(manifest)
+    return done, [path for path in ASSETS if path not in stale]
+
+if __name__ == "__main__":
+    generated, skipped = create_assets(force='--force' in sys.argv[1:])
+    if generated:
+        print(f"Created {len(generated)} assets ({len(skipped)} up to date)")
+    else:
+        print("Assets up to date")
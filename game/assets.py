@@ -0,0 +1,67 @@
+import pygame
+
+class AssetRegistry:
+    """Process-wide cache of loaded, converted and scaled images"""
+    def __init__(self):
+        self.images = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def get_image(self, path, size=None, fallback=None, alpha=True):
+        """Return a shared Surface for path at size, loading it only once
+
+        fallback is a callable returning a Surface, used (and cached) when the
+        file can't be loaded. Callers must copy the Surface before drawing on it.
+        """
+        key = (path, size, alpha)
+        image = self.images.get(key)
+        if image is not None:
+            self.hits += 1
+            return image
+        
+        self.misses += 1
+        try:
+            image = pygame.image.load(path)
+            image = image.convert_alpha() if alpha else image.convert()
+            if size:
+                image = pygame.transform.scale(image, size)
+        except:
+            if fallback is None:
+                raise
+            image = fallback()
+        
+        self.images[key] = image
+        return image
+    
+    def get_surface(self, name, factory):
+        """Return a shared generated Surface, creating it with factory only once"""
+        image = self.images.get(name)
+        if image is not None:
+            self.hits += 1
+            return image
+        
+        self.misses += 1
+        image = factory()
+        self.images[name] = image
+        return image
+    
+    def get_stats(self):
+        """Get cache hit/miss counters"""
+        return {
+            'images': len(self.images),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+    
+    def reset_stats(self):
+        """Reset the hit/miss counters without dropping cached images"""
+        self.hits = 0
+        self.misses = 0
+    
+    def clear(self):
+        """Drop every cached image (e.g. after the display mode changes)"""
+        self.images.clear()
+        self.reset_stats()
+
+# Shared registry used by every sprite
+assets = AssetRegistry()
@@ -0,0 +1,114 @@
+import pygame
+
+VOICES = 8  # Mixer channels reserved for game sounds
+
+# name -> (file, most voices playing it at once, priority)
+# Higher priority sounds can take a voice from lower ones when all are busy.
+SOUNDS = {
+    'shoot': ("assets/sounds/shoot.wav", 2, 1),
+    'explosion': ("assets/sounds/explosion.wav", 4, 2),
+}
+
+def load_bank(sounds=SOUNDS):
+    """Load every sound up front, name -> Sound or None when it can't be loaded"""
+    bank = {}
+    for name, (path, _, _) in sounds.items():
+        try:
+            bank[name] = pygame.mixer.Sound(path)
+        except (pygame.error, FileNotFoundError):
+            bank[name] = None
+    return bank
+
+class VoicePool:
+    """Plays sounds on a fixed set of reserved mixer channels
+
+    play() only records the request: several plays of a sound in one frame
+    (ten enemies dying to one spray of bullets) collapse into one, keeping the
+    highest priority asked for. flush() starts the frame's sounds, at most one
+    per sound name, so the mixing work per frame stays bounded however busy
+    the game gets. A sound already at its voice limit restarts its oldest
+    voice; when every channel is busy, the oldest voice of the lowest priority
+    below the new sound's is stolen, and otherwise the new sound is dropped.
+    """
+    def __init__(self, bank, sounds=SOUNDS, voices=VOICES):
+        self.bank = bank
+        self.limits = {name: limit for name, (_, limit, _) in sounds.items()}
+        self.priorities = {name: priority for name, (_, _, priority) in sounds.items()}
+        self.pending = {}  # name -> priority, for the current frame
+        self.counter = 0  # Start order, to find the oldest voice
+        self.stats = {'requested': 0, 'played': 0, 'merged': 0, 'stolen': 0, 'dropped': 0}
+        
+        # No mixer (no audio device), everything becomes a no-op
+        self.channels = []
+        if pygame.mixer.get_init():
+            if pygame.mixer.get_num_channels() < voices:
+                pygame.mixer.set_num_channels(voices)
+            # Reserved channels are never picked by a plain Sound.play()
+            pygame.mixer.set_reserved(voices)
+            self.channels = [pygame.mixer.Channel(i) for i in range(voices)]
+        self.voices = [None] * len(self.channels)  # (name, priority, start order) per channel
+    
+    def play(self, name, priority=None):
+        """Queue a sound for the next flush(), priority defaults to the sound's own"""
+        self.stats['requested'] += 1
+        if priority is None:
+            priority = self.priorities.get(name, 0)
+        if name in self.pending:
+            self.stats['merged'] += 1
+            if priority <= self.pending[name]:
+                return
+        self.pending[name] = priority
+    
+    def flush(self):
+        """Start the sounds queued since the last flush, most important first"""
+        if not self.pending:
+            return
+        pending = sorted(self.pending.items(), key=lambda item: -item[1])
+        self.pending = {}
+        if not self.channels:
+            return
+        
+        # Voices whose sound finished are free again
+        for i, channel in enumerate(self.channels):
+            if self.voices[i] and not channel.get_busy():
+                self.voices[i] = None
+        
+        for name, priority in pending:
+            sound = self.bank.get(name)
+            if sound is None:
+                continue
+            index = self.pick_channel(name, priority)
+            if index is None:
+                self.stats['dropped'] += 1
+                continue
+            self.counter += 1
+            self.channels[index].play(sound)
+            self.voices[index] = (name, priority, self.counter)
+            self.stats['played'] += 1
+    
+    def pick_channel(self, name, priority):
+        """Index of the channel to play name on, or None to drop it"""
+        playing = [i for i, voice in enumerate(self.voices) if voice and voice[0] == name]
+        if len(playing) >= self.limits.get(name, len(self.channels)):
+            return self.oldest(playing)
+        
+        for i, voice in enumerate(self.voices):
+            if voice is None:
+                return i
+        
+        # Every channel is busy, take the oldest of the least important voices
+        lowest = min(voice[1] for voice in self.voices)
+        if lowest >= priority:
+            return None
+        self.stats['stolen'] += 1
+        return self.oldest([i for i, voice in enumerate(self.voices) if voice[1] == lowest])
+    
+    def oldest(self, indexes):
+        return min(indexes, key=lambda i: self.voices[i][2])
+    
+    def stop(self):
+        """Silence every voice and forget anything queued"""
+        self.pending = {}
+        for i, channel in enumerate(self.channels):
+            channel.stop()
+            self.voices[i] = None
@@ -1,24 +1,35 @@
 import pygame
 
-class Bullet(pygame.sprite.Sprite):
+from game.assets import assets
+from game.pool import PooledSprite
+
+def _create_image():
+    """Create the bullet image"""
+    image = pygame.Surface((5, 15))
+    image.fill((255, 255, 0))
+    return image
+
+class Bullet(PooledSprite):
     def __init__(self, x, y):
         super().__init__()
         
-        # Create bullet
-        self.image = pygame.Surface((5, 15))
-        self.image.fill((255, 255, 0))
+        # Create bullet (image shared between all bullets)
+        self.image = assets.get_surface("bullet", _create_image)
         
         self.rect = self.image.get_rect()
+        self.reset(x, y)
+        
+    def reset(self, x, y):
         self.rect.centerx = x
         self.rect.bottom = y
         
         # Bullet attributes
         self.speed = 10
         
-    def update(self):
+    def update(self, screen_height):
         # Move bullet up
         self.rect.y -= self.speed
         
-        # Remove bullet if it goes off screen
-        if self.rect.bottom < 0:
+        # Remove bullet if it goes off screen (remote bullets can fly down)
+        if self.rect.bottom < 0 or self.rect.top > screen_height:
             self.kill()
@@ -0,0 +1,87 @@
+import pygame
+
+# Below these sizes the plain pygame loops beat building a grid
+BRUTE_FORCE_PAIRS = 10000
+MIN_GRID_SPRITES = 32
+
+class SpatialHash:
+    """Uniform grid broadphase for rect collisions
+
+    Sprites are bucketed by the grid cells their rect overlaps, so a query only
+    tests the sprites sharing a cell instead of the whole group.
+    """
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.order = {}
+    
+    def build(self, sprites):
+        """Rebuild the grid from an iterable of sprites"""
+        self.cells.clear()
+        self.order.clear()
+        size = self.cell_size
+        cells = self.cells
+        
+        for index, sprite in enumerate(sprites):
+            self.order[sprite] = index
+            rect = sprite.rect
+            for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+                for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                    cell = cells.get((cx, cy))
+                    if cell is None:
+                        cells[(cx, cy)] = [sprite]
+                    else:
+                        cell.append(sprite)
+    
+    def query(self, rect):
+        """Get the sprites sharing a cell with rect, in the order they were added"""
+        size = self.cell_size
+        cells = self.cells
+        candidates = set()
+        
+        for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    candidates.update(cell)
+        
+        if len(candidates) > 1:
+            return sorted(candidates, key=self.order.__getitem__)
+        return list(candidates)
+    
+    def collide(self, rect):
+        """Get the sprites whose rect overlaps rect"""
+        return [sprite for sprite in self.query(rect) if rect.colliderect(sprite.rect)]
+
+def spritecollide(sprite, group, dokill, grid=None):
+    """Drop-in for pygame.sprite.spritecollide using a spatial hash
+
+    Pass a grid built from group to reuse it across calls in the same tick;
+    sprites removed from group since it was built are skipped. Without one a
+    single query can't beat a linear scan, so pygame's version is used.
+    """
+    if grid is None:
+        return pygame.sprite.spritecollide(sprite, group, dokill)
+    
+    hits = [other for other in grid.collide(sprite.rect) if other in group]
+    if dokill:
+        for other in hits:
+            other.kill()
+    return hits
+
+def groupcollide(groupa, groupb, dokilla, dokillb, grid=None):
+    """Drop-in for pygame.sprite.groupcollide using a spatial hash on groupb"""
+    if grid is None:
+        if len(groupa) * len(groupb) <= BRUTE_FORCE_PAIRS:
+            return pygame.sprite.groupcollide(groupa, groupb, dokilla, dokillb)
+        grid = SpatialHash()
+        grid.build(groupb)
+    
+    crashed = {}
+    for sprite in groupa.sprites():
+        hits = spritecollide(sprite, groupb, dokillb, grid)
+        if hits:
+            crashed[sprite] = hits
+            if dokilla:
+                sprite.kill()
+    return crashed
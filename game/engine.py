@@ -0,0 +1,92 @@
+import os
+import pygame
+
+from game.assets import assets
+from game.audio import VoicePool, load_bank
+
+try:
+    from pygame._sdl2.video import Window
+except ImportError:
+    Window = None
+
+class Engine:
+    """A pygame session that outlives individual games
+
+    Owns the window, fonts, sounds and the shared image cache. A Game attaches
+    to it instead of initializing SDL itself, and between games the window is
+    hidden rather than destroyed, so starting the next match only builds the
+    game objects. close() shuts pygame down once the application is done.
+    """
+    def __init__(self, width=800, height=600, headless=False):
+        self.width = width
+        self.height = height
+        self.headless = headless  # Dummy video and audio drivers, for tests and servers
+        self.screen = None
+        self.window = None  # SDL window handle, for hiding it between games
+        self.font = None
+        self.big_font = None
+        self.sounds = {}  # Preloaded sound bank, name -> Sound or None
+        self.audio = None  # Voice pool every game plays its sounds through
+        self.games = 0  # Games attached so far
+        self.start()
+    
+    def start(self):
+        """Initialize the display, fonts and mixer and load the shared assets"""
+        if self.headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
+            
+            # The driver is picked when the display is initialized
+            if pygame.display.get_init() and pygame.display.get_driver() != 'dummy':
+                pygame.display.quit()
+                assets.clear()
+        pygame.display.init()
+        self.screen = pygame.display.set_mode((self.width, self.height))
+        if Window is not None:
+            self.window = Window.from_display_module()
+            if not self.headless:
+                self.window.hide()  # Until a game attaches
+        
+        pygame.font.init()
+        self.font = pygame.font.Font(None, 36)
+        self.big_font = pygame.font.Font(None, 72)
+        
+        try:
+            pygame.mixer.init()
+        except pygame.error as e:
+            print(f"Sound unavailable: {e}")
+        self.sounds = load_bank()
+        self.audio = VoicePool(self.sounds)
+        
+        # Decoded and converted once for every game
+        try:
+            self.background = assets.get_image("assets/images/sky_bg.jpg",
+                                               (self.width, self.height), alpha=False)
+        except (pygame.error, FileNotFoundError):
+            self.background = None
+    
+    def attach(self, caption="Sky Warr - In Game"):
+        """Show the window for a new game and drop input left over from the last one"""
+        self.games += 1
+        pygame.display.set_caption(caption)
+        if self.window is not None and not self.headless:
+            self.window.show()
+        pygame.event.clear()
+        return self.screen
+    
+    def detach(self):
+        """Hide the window until the next game"""
+        self.audio.stop()
+        if self.headless:
+            return
+        if self.window is not None:
+            self.window.hide()
+        else:
+            pygame.display.iconify()
+    
+    def close(self):
+        """Shut pygame down, nothing can attach after this"""
+        pygame.quit()
+        assets.clear()
+        self.screen = None
+        self.window = None
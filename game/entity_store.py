@@ -0,0 +1,177 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Entity kinds, used to pick the sprite image when drawing
+ENEMY = 0
+BULLET = 1
+CLOUD = 2
+PLAYER = 3
+
+class EntityStore:
+    """Array-backed store for large numbers of simple moving entities
+
+    Positions, velocities, sizes and alive flags live in NumPy arrays so a
+    whole wave moves, wraps and gets culled in a handful of vector operations
+    instead of one Sprite.update() call per entity. Wrapping entities behave
+    like Enemy.update() (back to the top when they leave the bottom), the rest
+    like Bullet.update() (killed once off screen).
+    """
+    def __init__(self, capacity=1024, screen_width=800, screen_height=600, seed=None):
+        if np is None:
+            raise ImportError("EntityStore requires numpy")
+        
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.rng = np.random.default_rng(seed)
+        self.capacity = 0
+        self.high_water = 0  # Highest slot in use, so updates skip the unused tail
+        self.free = []  # Dead slots below high_water to reuse, may hold stale entries
+        self._allocate(capacity)
+    
+    def _allocate(self, capacity):
+        """Grow every array to capacity, keeping existing entities"""
+        def grow(old, dtype):
+            new = np.zeros(capacity, dtype=dtype)
+            if old is not None:
+                new[:len(old)] = old
+            return new
+        
+        self.x = grow(getattr(self, 'x', None), np.float32)
+        self.y = grow(getattr(self, 'y', None), np.float32)
+        self.vx = grow(getattr(self, 'vx', None), np.float32)
+        self.vy = grow(getattr(self, 'vy', None), np.float32)
+        self.w = grow(getattr(self, 'w', None), np.int16)
+        self.h = grow(getattr(self, 'h', None), np.int16)
+        self.kind = grow(getattr(self, 'kind', None), np.int8)
+        self.wrap = grow(getattr(self, 'wrap', None), np.bool_)
+        self.alive = grow(getattr(self, 'alive', None), np.bool_)
+        self.capacity = capacity
+    
+    def spawn(self, kind, x, y, vx, vy, w, h, wrap=False):
+        """Add an entity and return its slot index"""
+        # Slots past high_water or already reused by spawn_many are stale
+        index = None
+        while self.free:
+            slot = self.free.pop()
+            if slot < self.high_water and not self.alive[slot]:
+                index = slot
+                break
+        if index is None:
+            if self.high_water == self.capacity:
+                self._allocate(self.capacity * 2)
+            index = self.high_water
+            self.high_water += 1
+        
+        self.x[index] = x
+        self.y[index] = y
+        self.vx[index] = vx
+        self.vy[index] = vy
+        self.w[index] = w
+        self.h[index] = h
+        self.kind[index] = kind
+        self.wrap[index] = wrap
+        self.alive[index] = True
+        return index
+    
+    def spawn_many(self, kind, x, y, vx, vy, w, h, wrap=False):
+        """Append a batch of entities from arrays (or scalars) and return their slots"""
+        count = len(x)
+        start = self.high_water
+        if start + count > self.capacity:
+            capacity = self.capacity
+            while start + count > capacity:
+                capacity *= 2
+            self._allocate(capacity)
+        
+        end = start + count
+        self.x[start:end] = x
+        self.y[start:end] = y
+        self.vx[start:end] = vx
+        self.vy[start:end] = vy
+        self.w[start:end] = w
+        self.h[start:end] = h
+        self.kind[start:end] = kind
+        self.wrap[start:end] = wrap
+        self.alive[start:end] = True
+        self.high_water = end
+        return np.arange(start, end)
+    
+    def kill(self, index):
+        """Mark an entity (or an array of entities) as dead"""
+        slots = np.atleast_1d(index)
+        slots = slots[self.alive[slots]]
+        self.alive[slots] = False
+        self.free.extend(slots.tolist())
+    
+    def clear(self):
+        """Kill every entity"""
+        self.alive[:] = False
+        self.high_water = 0
+        self.free = []
+    
+    def update(self):
+        """Move every live entity one tick, wrapping or killing those off screen"""
+        n = self.high_water
+        alive = self.alive[:n]
+        x, y = self.x[:n], self.y[:n]
+        
+        x += self.vx[:n] * alive
+        y += self.vy[:n] * alive
+        
+        # Enemies that fell off the bottom go back to the top
+        wrapped = alive & self.wrap[:n] & (y > self.screen_height)
+        count = int(wrapped.sum())
+        if count:
+            y[wrapped] = self.rng.integers(-100, -40, count, endpoint=True)
+            x[wrapped] = self.rng.random(count) * (self.screen_width - self.w[:n][wrapped])
+        
+        # Bullets that left the screen in either direction are killed
+        gone = alive & ~self.wrap[:n] & ((y + self.h[:n] < 0) | (y > self.screen_height))
+        if gone.any():
+            alive[gone] = False
+            self.free.extend(np.flatnonzero(gone).tolist())
+        
+        # Drop dead slots off the end so the next update touches less memory
+        live = np.flatnonzero(alive)
+        self.high_water = int(live[-1]) + 1 if len(live) else 0
+        if len(self.free) > self.high_water:
+            # Mostly stale now, rebuild it from the alive flags
+            self.free = np.flatnonzero(~self.alive[:self.high_water])[::-1].tolist()
+    
+    def visible(self):
+        """Get the indices of live entities that overlap the screen"""
+        n = self.high_water
+        x, y = self.x[:n], self.y[:n]
+        on_screen = (self.alive[:n]
+                     & (x + self.w[:n] > 0) & (x < self.screen_width)
+                     & (y + self.h[:n] > 0) & (y < self.screen_height))
+        return np.flatnonzero(on_screen)
+    
+    def draws(self, images):
+        """(surface, position) pairs for the visible entities, images indexed by kind"""
+        indices = self.visible()
+        xs = self.x[indices].astype(np.int32).tolist()
+        ys = self.y[indices].astype(np.int32).tolist()
+        kinds = self.kind[indices].tolist()
+        return [(images[k], (px, py)) for k, px, py in zip(kinds, xs, ys)]
+    
+    def draw(self, screen, images):
+        """Blit visible entities using images indexed by kind (the existing sprite images)"""
+        draws = self.draws(images)
+        screen.blits(draws, False)
+        return len(draws)
+    
+    def __len__(self):
+        return int(self.alive[:self.high_water].sum())
+    
+    def bytes_per_entity(self):
+        """Memory used per entity slot across all arrays"""
+        arrays = (self.x, self.y, self.vx, self.vy, self.w, self.h,
+                  self.kind, self.wrap, self.alive)
+        return sum(array.itemsize for array in arrays)
+    
+    def nbytes(self):
+        """Total memory held by the arrays"""
+        return self.bytes_per_entity() * self.capacity
@@ -1,25 +1,89 @@
 import pygame
 import sys
 import random
+import time
 from pygame.locals import *
 
 from game.player import Player
 from game.enemy import Enemy
 from game.cloud import Cloud
 from game.bullet import Bullet
+from game.engine import Engine
+from game.input import KeyState, buttons_from_keys
+from game.entity_store import BULLET, ENEMY, PLAYER, EntityStore
+from game.renderer import DirtyRectRenderer
+from game.pool import SpritePool
+from game.hud import Hud
+from game.collision import MIN_GRID_SPRITES, SpatialHash, groupcollide, spritecollide
+from game.replay import ReplayRecorder, state_checksum
+from game.profiler import FrameProfiler, no_lap
+
+# Simulation runs at a fixed rate, independent of the render frame rate
+TICK_RATE = 60
+MAX_CATCHUP_TICKS = 5  # Ticks per frame before dropping the backlog
+SNAP_DISTANCE = 100  # Moves bigger than this (wraps, respawns) aren't interpolated
+SWARM_SPRITE_SIZE = 12  # Background swarm ships, in pixels
+PLAYER_HIT_PRIORITY = 3  # Getting hit is heard over everything else going off
 
 class Game:
-    def __init__(self, difficulty="normal", multiplayer=False, client=None):
+    def __init__(self, difficulty="normal", multiplayer=False, client=None, headless=False,
+                 max_fps=60, dirty_rects=False, bullet_pool_size=128, enemy_pool_size=64,
+                 hud_digit_atlas=False, seed=None, record_path=None, net_overlay=False,
+                 profile=False, profile_path=None, engine=None, swarm=0):
         self.difficulty = difficulty
         self.width = 800
         self.height = 600
         self.multiplayer = multiplayer
         self.client = client
         self.player_id = 0  # Will be set by server in multiplayer mode
+        self.authoritative = False  # Server runs the match, we predict our own player
+        self.net_overlay = net_overlay  # Network stats on screen (toggle with F3)
+        self.headless = headless
+        self.max_fps = max_fps  # 0 renders as fast as possible
+        self.tick_dt = 1.0 / TICK_RATE
+        
+        # Every random choice comes from this game's RNG, so a seed and the
+        # inputs reproduce a whole run
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        
+        # Optional per-tick input log, written to record_path when the game ends
+        self.record_path = record_path
+        self.recorder = None
+        if record_path and not multiplayer:
+            self.recorder = ReplayRecorder(self.seed, difficulty)
+        self.tick_presses = []
+        
+        # Optional per-phase frame timing (F4 shows it), exported to profile_path
+        # on exit. Code marks the end of each phase with self.lap(name), which
+        # does nothing until profiling starts.
+        self.profile_path = profile_path
+        self.profiler = None
+        self.profile_overlay = False
+        self.lap = no_lap
+        if profile or profile_path:
+            self.start_profiling()
+        
+        # The display, mixer and fonts live in an engine session, which can
+        # outlast this game. Without one, the game starts its own and shuts
+        # pygame down when it ends. Headless engines use dummy SDL drivers and
+        # the game takes injected input.
+        self.owns_engine = engine is None
+        self.engine = engine or Engine(self.width, self.height, headless=headless)
+        self.key_state = KeyState()
+        self.pending_keys = []
+        self.tick_count = 0
+        self.enemy_grid = SpatialHash()
+        
+        # Recycled bullets and enemies, so firing and spawning don't allocate.
+        # Filled up front so the first wave and burst of shots don't either.
+        self.bullet_pool = SpritePool(Bullet, bullet_pool_size)
+        self.enemy_pool = SpritePool(Enemy, enemy_pool_size)
+        self.bullet_pool.preallocate(bullet_pool_size, 0, 0)
+        self.enemy_pool.preallocate(enemy_pool_size, 0, 0, 0)
         
         # Set up display
-        self.screen = pygame.display.set_mode((self.width, self.height))
-        pygame.display.set_caption("Sky Warr - In Game")
+        self.screen = self.engine.attach("Sky Warr - In Game")
         
         # Set up clock
         self.clock = pygame.time.Clock()
@@ -27,6 +91,14 @@ class Game:
         # Load assets
         self.load_assets()
         
+        # Optional dirty-rectangle renderer for software-rendered displays
+        self.renderer = None
+        if dirty_rects and not self.headless:
+            self.renderer = DirtyRectRenderer(self.screen, self.background)
+        
+        # HUD text is cached and only re-rendered when its value changes
+        self.hud = Hud(self.font, self.big_font, self.width, self.height, hud_digit_atlas)
+        
         # Game state
         self.running = True
         self.score = 0
@@ -42,10 +114,22 @@ class Game:
         # Set player-specific difficulty settings (after player creation)
         self.set_player_difficulty(difficulty)
         
+        # Optional background swarm of array-backed entities (needs NumPy), for
+        # pushing entity counts far past what sprite groups can move at 60 Hz
+        self.swarm = None
+        if swarm:
+            self.spawn_swarm(swarm)
+        
         # Multiplayer initialization if needed
         if self.multiplayer and self.client:
             self.init_multiplayer()
     
+    def start_profiling(self):
+        """Start timing frames (a no-op if already profiling)"""
+        if self.profiler is None:
+            self.profiler = FrameProfiler()
+            self.lap = self.profiler.lap
+    
     def init_multiplayer(self):
         """Initialize multiplayer-specific components"""
         # Get player ID from server
@@ -56,35 +140,37 @@ class Game:
         if self.player_id == 1:
             # If we're player 1, remote player should be positioned differently
             self.remote_player.rect.y = 100  # Position at top
+            # Copy the shared image so the local player keeps its colors
+            self.remote_player.image = self.remote_player.image.copy()
             self.remote_player.image.fill((255, 0, 0, 0))  # Mark with different color
             pygame.draw.polygon(self.remote_player.image, (255, 0, 0), 
                              [(0, 0), (25, 40), (50, 0)])  # Flip orientation
+        
+        if self.client.authoritative:
+            # The server owns the world, drop the locally spawned wave
+            self.authoritative = True
+            for enemy in self.enemies.sprites():
+                enemy.kill()
+            self.world_sprites = {}  # Server entity id -> local sprite
+            self.fire_pending = False
+            if self.client.spawn_position:
+                self.player.rect.center = self.client.spawn_position
     
     def load_assets(self):
-        """Load game assets like images and sounds"""
-        # Background
-        try:
-            self.background = pygame.image.load("assets/images/sky_bg.jpg").convert()
-            self.background = pygame.transform.scale(self.background, (self.width, self.height))
-        except:
-            self.background = None
-            
-        # Load fonts
-        pygame.font.init()
-        self.font = pygame.font.Font(None, 36)
-        self.big_font = pygame.font.Font(None, 72)
-        
-        # Load sounds
-        pygame.mixer.init()
-        try:
-            self.shoot_sound = pygame.mixer.Sound("assets/sounds/shoot.wav")
-            self.explosion_sound = pygame.mixer.Sound("assets/sounds/explosion.wav")
-        except:
-            self.shoot_sound = None
-            self.explosion_sound = None
+        """Take the images, fonts and sounds the engine has loaded"""
+        self.background = self.engine.background
+        self.font = self.engine.font
+        self.big_font = self.engine.big_font
+        self.audio = self.engine.audio
     
     def init_game_objects(self):
         """Initialize game objects"""
+        # Hand the previous game's bullets and enemies back to their pools
+        if hasattr(self, 'enemies'):
+            for group in (self.enemies, self.bullets):
+                for sprite in group.sprites():
+                    sprite.kill()
+        
         # Create the player
         self.player = Player(self.width // 2, self.height - 100)
         
@@ -128,18 +214,32 @@ class Game:
         # Reduce enemies in multiplayer mode
         if self.multiplayer:
             count = max(1, count // 2)
-            
+        
         for _ in range(count):
-            enemy = Enemy(random.randint(50, self.width - 50), 
-                         random.randint(-300, 0),
-                         self.enemy_speed)
+            enemy = self.enemy_pool.acquire(self.rng.randint(50, self.width - 50), 
+                                            self.rng.randint(-300, 0),
+                                            self.enemy_speed)
             self.enemies.add(enemy)
     
+    def spawn_swarm(self, count):
+        """Fill the background with count distant enemies drifting down in an EntityStore"""
+        # Its own RNG, so the swarm doesn't change the seeded game
+        self.swarm = EntityStore(count, self.width, self.height, seed=self.seed)
+        rng = self.swarm.rng
+        self.swarm.spawn_many(ENEMY, rng.random(count) * (self.width - SWARM_SPRITE_SIZE),
+                              rng.random(count) * self.height, 0, rng.uniform(0.5, 3.0, count),
+                              SWARM_SPRITE_SIZE, SWARM_SPRITE_SIZE, wrap=True)
+        
+        # The enemy sprite's own image, shrunk so the swarm reads as far away
+        image = pygame.transform.smoothscale(Enemy(0, 0, 0).image,
+                                             (SWARM_SPRITE_SIZE, SWARM_SPRITE_SIZE))
+        self.swarm_images = {ENEMY: image}
+    
     def spawn_clouds(self, count):
         """Spawn decorative clouds"""
         for _ in range(count):
-            cloud = Cloud(random.randint(0, self.width), 
-                         random.randint(0, self.height))
+            cloud = Cloud(self.rng.randint(0, self.width), 
+                         self.rng.randint(0, self.height), self.rng)
             self.clouds.add(cloud)
     
     def handle_events(self):
@@ -150,79 +250,197 @@ class Game:
                 if self.multiplayer and self.client:
                     self.client.disconnect()
             elif event.type == KEYDOWN:
-                if event.key == K_ESCAPE:
-                    self.running = False
-                    if self.multiplayer and self.client:
-                        self.client.disconnect()
-                elif event.key == K_SPACE and not self.game_over:
-                    # Fire bullet
-                    bullet = Bullet(self.player.rect.centerx, self.player.rect.top)
-                    self.bullets.add(bullet)
-                    if self.shoot_sound:
-                        self.shoot_sound.play()
-                    
-                    # Send bullet fire event in multiplayer
-                    if self.multiplayer and self.client:
-                        self.client.send_bullet()
-                        
-                elif event.key == K_r and self.game_over:
-                    # Restart game (single player only)
-                    if not self.multiplayer:
-                        self.init_game_objects()
-                        self.score = 0
-                        self.game_over = False
+                self.handle_key(event.key)
+            elif event.type in (VIDEOEXPOSE, WINDOWEXPOSED) and self.renderer:
+                self.renderer.invalidate()
+    
+    def handle_key(self, key):
+        """Handle a single key press"""
+        # Only presses that take effect are logged, so a replayed restart always
+        # comes before any shot fired in the same tick
+        if self.recorder and (key == K_SPACE and not self.game_over
+                              or key == K_r and self.game_over):
+            self.tick_presses.append(key)
+        
+        if key == K_ESCAPE:
+            self.running = False
+            if self.multiplayer and self.client:
+                self.client.disconnect()
+        elif key == K_SPACE and not self.game_over:
+            if self.authoritative:
+                # Sent with the next input, the server creates the bullet
+                self.fire_pending = True
+            else:
+                # Fire bullet
+                bullet = self.bullet_pool.acquire(self.player.rect.centerx, self.player.rect.top)
+                self.bullets.add(bullet)
+            self.audio.play('shoot')
+            
+            # Send bullet fire event in multiplayer
+            if self.multiplayer and self.client and not self.authoritative:
+                self.client.send_bullet()
+        
+        elif key == K_F3:
+            self.net_overlay = not self.net_overlay
+            if self.renderer:
+                self.renderer.invalidate()
+        
+        elif key == K_F4:
+            self.start_profiling()
+            self.profile_overlay = not self.profile_overlay
+            if self.renderer:
+                self.renderer.invalidate()
+        
+        elif key == K_r and self.game_over:
+            # Restart game (single player only)
+            if not self.multiplayer:
+                self.init_game_objects()
+                self.score = 0
+                self.game_over = False
+    
+    def press_key(self, key):
+        """Queue a key press for the next headless tick"""
+        self.pending_keys.append(key)
+    
+    def set_held_keys(self, keys):
+        """Set the keys held down for the following headless ticks"""
+        self.key_state.set(keys)
+    
+    def get_keys(self):
+        """Get the held-key state for this tick"""
+        if self.headless:
+            return self.key_state
+        return pygame.key.get_pressed()
+    
+    def step(self, n=1):
+        """Advance the simulation n fixed ticks"""
+        for _ in range(n):
+            if not self.running:
+                break
+            
+            # Deliver injected key presses instead of pygame events
+            if self.pending_keys:
+                keys, self.pending_keys = self.pending_keys, []
+                for key in keys:
+                    self.handle_key(key)
+            
+            # Log the input this tick runs on (presses since the last tick, held keys)
+            if self.recorder:
+                self.recorder.record(self.get_keys(), self.tick_presses)
+                self.tick_presses = []
+            
+            # Remember where sprites were so render can interpolate
+            if not self.headless:
+                self.store_previous_positions()
+            self.lap('input')
+            
+            self.update()
+            if self.swarm is not None:
+                self.swarm.update()
+                self.lap('swarm')
+            self.tick_count += 1
+            
+            if self.recorder and self.tick_count % self.recorder.checksum_interval == 0:
+                self.recorder.checkpoint(state_checksum(self))
+        
+        return self.tick_count
+    
+    def store_previous_positions(self):
+        """Record every sprite's position before a tick"""
+        for group in (self.clouds, self.bullets, self.enemies):
+            for sprite in group:
+                sprite.prev_pos = sprite.rect.topleft
+        self.player.prev_pos = self.player.rect.topleft
+        if self.multiplayer:
+            self.remote_player.prev_pos = self.remote_player.rect.topleft
+    
+    def interpolate(self, sprite, alpha):
+        """Get the draw position between the last two ticks"""
+        x, y = sprite.rect.topleft
+        prev = getattr(sprite, 'prev_pos', None)
+        if prev is None or alpha >= 1.0:
+            return x, y
+        
+        prev_x, prev_y = prev
+        if abs(x - prev_x) > SNAP_DISTANCE or abs(y - prev_y) > SNAP_DISTANCE:
+            return x, y
+        return (round(prev_x + (x - prev_x) * alpha),
+                round(prev_y + (y - prev_y) * alpha))
+    
+    def group_draws(self, group, alpha):
+        """Get (image, position) pairs for a sprite group at interpolated positions"""
+        return [(sprite.image, self.interpolate(sprite, alpha)) for sprite in group]
     
     def update(self):
         """Update game state"""
         if self.game_over:
             return
-            
+        
+        if self.authoritative:
+            self.update_from_server()
+            return
+        
         # Update player
-        keys = pygame.key.get_pressed()
+        keys = self.get_keys()
         self.player.update(keys, self.width)
+        self.lap('player')
         
         # In multiplayer, send our position and get remote player's position
         if self.multiplayer and self.client:
-            # Send our position
+            # Ease out any error the server found in our predicted position
+            dx, dy = self.client.get_position_correction(self.tick_dt)
+            if dx or dy:
+                self.player.rect.move_ip(dx, dy)
+            
+            # Queue our position, the client sends one state packet per network tick
             self.client.send_position(self.player.rect.centerx, self.player.rect.centery)
+            self.client.pump()
             
-            # Get remote player position
-            remote_x, remote_y = self.client.get_remote_position()
-            if remote_x and remote_y:  # Only update if we got valid coordinates
-                self.remote_player.rect.centerx = remote_x
-                self.remote_player.rect.centery = remote_y
+            # Remote player is drawn slightly in the past, between received positions
+            remote = self.client.get_interpolated_remote_position()
+            if remote:
+                self.remote_player.rect.centerx = round(remote[0])
+                self.remote_player.rect.centery = round(remote[1])
             
             # Process any remote bullets
             remote_bullets = self.client.get_remote_bullets()
             for bullet_pos in remote_bullets:
-                bullet = Bullet(bullet_pos[0], bullet_pos[1])
+                bullet = self.bullet_pool.acquire(bullet_pos[0], bullet_pos[1])
                 # Adjust bullet direction for player 2
                 if self.player_id == 1:
                     bullet.speed = -bullet.speed
                 self.bullets.add(bullet)
+            self.lap('network')
         
         # Update enemies
-        self.enemies.update(self.height)
+        self.enemies.update(self.height, self.rng)
+        self.lap('enemies')
         
         # Update bullets
-        self.bullets.update()
+        self.bullets.update(self.height)
+        self.lap('bullets')
         
         # Update clouds
-        self.clouds.update()
+        self.clouds.update(self.rng)
+        self.lap('clouds')
+        
+        # Bucket enemies once per tick for all collision checks below (dense waves only)
+        enemy_grid = None
+        if len(self.enemies) >= MIN_GRID_SPRITES:
+            self.enemy_grid.build(self.enemies)
+            enemy_grid = self.enemy_grid
         
         # Check for bullet/enemy collisions
-        collisions = pygame.sprite.groupcollide(self.bullets, self.enemies, True, True)
+        collisions = groupcollide(self.bullets, self.enemies, True, True, enemy_grid)
         for bullet, hit_enemies in collisions.items():
             for enemy in hit_enemies:
                 self.score += 10
-                if self.explosion_sound:
-                    self.explosion_sound.play()
+                self.audio.play('explosion')
         
         # Check for player/enemy collisions
-        if pygame.sprite.spritecollide(self.player, self.enemies, True):
+        if spritecollide(self.player, self.enemies, True, enemy_grid):
             self.player.health -= 1
-            if self.explosion_sound:
-                self.explosion_sound.play()
+            self.audio.play('explosion', PLAYER_HIT_PRIORITY)
             
             if self.player.health <= 0:
                 self.game_over = True
@@ -231,89 +449,212 @@ class Game:
         
         # In multiplayer, check if remote player is hit
         if self.multiplayer:
-            if pygame.sprite.spritecollide(self.remote_player, self.enemies, True):
+            if spritecollide(self.remote_player, self.enemies, True, enemy_grid):
                 # Let the server handle remote player health
                 pass
+        self.lap('collision')
         
         # Spawn new enemies
-        if len(self.enemies) < 5 + self.level and random.randint(0, self.enemy_spawn_rate) == 0:
+        if len(self.enemies) < 5 + self.level and self.rng.randint(0, self.enemy_spawn_rate) == 0:
             self.spawn_enemies(1)
         
         # Spawn new clouds
-        if len(self.clouds) < 10 and random.randint(0, 100) == 0:
+        if len(self.clouds) < 10 and self.rng.randint(0, 100) == 0:
             self.spawn_clouds(1)
         
         # Level up every 200 points
         if self.score > 0 and self.score // 200 > self.level - 1:
             self.level += 1
             self.enemy_speed += 0.5
+        self.lap('spawn')
     
-    def render(self):
-        """Render the game"""
+    def update_from_server(self):
+        """Multiplayer tick against an authoritative server
+        
+        Only our own movement is simulated here (and corrected by the server's
+        acks); enemies, bullets, score and health come from its snapshots.
+        """
+        dx, dy = self.client.get_position_correction(self.tick_dt)
+        if dx or dy:
+            self.player.rect.move_ip(dx, dy)
+        
+        # Predict our move and send the input that caused it
+        keys = self.get_keys()
+        self.player.update(keys, self.width)
+        buttons = buttons_from_keys(keys, self.fire_pending)
+        self.fire_pending = False
+        self.client.send_input(buttons, self.player.rect.centerx, self.player.rect.centery)
+        self.client.pump()
+        self.lap('network')
+        
+        self.sync_world(self.client.get_world())
+        self.lap('world')
+        
+        # Clouds are decorative, each client keeps its own
+        self.clouds.update(self.rng)
+        if len(self.clouds) < 10 and self.rng.randint(0, 100) == 0:
+            self.spawn_clouds(1)
+        self.lap('clouds')
+        
+        meta = self.client.get_world_meta()
+        if meta:
+            health = meta.get(f'health{self.player_id}', self.player.health)
+            hit = meta.get('score', 0) > self.score or health < self.player.health
+            if hit:
+                self.audio.play('explosion')
+            self.score = meta.get('score', self.score)
+            self.level = meta.get('level', self.level)
+            self.player.health = health
+            if health <= 0:
+                self.game_over = True
+    
+    def sync_world(self, world):
+        """Mirror the server's entities into local sprites so they draw as usual"""
+        seen = set()
+        for entity_id, (kind, x, y) in world.items():
+            position = (round(x), round(y))
+            if kind == PLAYER:
+                if entity_id != self.player_id:
+                    self.remote_player.rect.topleft = position
+                continue
+            
+            sprite = self.world_sprites.get(entity_id)
+            if sprite is None:
+                if kind == ENEMY:
+                    sprite = self.enemy_pool.acquire(x, y, 0)
+                    self.enemies.add(sprite)
+                elif kind == BULLET:
+                    sprite = self.bullet_pool.acquire(x, y)
+                    self.bullets.add(sprite)
+                else:
+                    continue
+                self.world_sprites[entity_id] = sprite
+            sprite.rect.topleft = position
+            seen.add(entity_id)
+        
+        for entity_id in [entity_id for entity_id in self.world_sprites if entity_id not in seen]:
+            self.world_sprites.pop(entity_id).kill()
+    
+    def build_draw_list(self, alpha):
+        """Collect every (surface, position) pair to draw this frame, back to front"""
+        # Swarm at tick positions, then clouds, bullets and enemies
+        draws = self.swarm.draws(self.swarm_images) if self.swarm is not None else []
+        draws += self.group_draws(self.clouds, alpha)
+        draws += self.group_draws(self.bullets, alpha)
+        draws += self.group_draws(self.enemies, alpha)
+        
+        # Player
+        draws.append((self.player.image, self.interpolate(self.player, alpha)))
+        
+        # Remote player in multiplayer mode
+        if self.multiplayer:
+            draws.append((self.remote_player.image,
+                          self.interpolate(self.remote_player, alpha)))
+        
+        # UI
+        draws += self.hud.build(self)
+        if self.net_overlay and self.multiplayer and self.client:
+            draws += self.hud.build_net_overlay(self.client, time.perf_counter())
+        if self.profile_overlay and self.profiler:
+            draws += self.hud.build_profile_overlay(self.profiler, time.perf_counter())
+        
+        return draws
+    
+    def render(self, alpha=1.0):
+        """Render the game, alpha of the way from the previous tick to the current one"""
+        draws = self.build_draw_list(alpha)
+        self.lap('draw_list')
+        
+        # Only push the changed areas to the display
+        if self.renderer:
+            self.renderer.draw(draws)
+            self.lap('blit')
+            return
+        
         # Draw background
         if self.background:
             self.screen.blit(self.background, (0, 0))
         else:
             self.screen.fill((135, 206, 235))  # Sky blue
         
-        # Draw clouds
-        self.clouds.draw(self.screen)
-        
-        # Draw bullets
-        self.bullets.draw(self.screen)
-        
-        # Draw enemies
-        self.enemies.draw(self.screen)
-        
-        # Draw player
-        self.screen.blit(self.player.image, self.player.rect)
-        
-        # Draw remote player in multiplayer mode
-        if self.multiplayer:
-            self.screen.blit(self.remote_player.image, self.remote_player.rect)
-        
-        # Draw UI
-        score_text = self.font.render(f"Score: {self.score}", True, (255, 255, 255))
-        self.screen.blit(score_text, (10, 10))
-        
-        level_text = self.font.render(f"Level: {self.level}", True, (255, 255, 255))
-        self.screen.blit(level_text, (10, 50))
-        
-        # Draw player indicator in multiplayer
-        if self.multiplayer:
-            player_text = self.font.render(f"You are Player {self.player_id + 1}", True, (255, 255, 255))
-            self.screen.blit(player_text, (10, 90))
-        
-        # Draw health bar
-        health_pct = self.player.health / self.player.max_health
-        pygame.draw.rect(self.screen, (255, 0, 0), (self.width - 110, 10, 100, 20))
-        pygame.draw.rect(self.screen, (0, 255, 0), 
-                       (self.width - 110, 10, 100 * health_pct, 20))
-        
-        # Draw game over
-        if self.game_over:
-            game_over_text = self.big_font.render("GAME OVER", True, (255, 0, 0))
-            
-            if self.multiplayer:
-                restart_text = self.font.render("Press ESC to exit", True, (255, 255, 255))
-            else:
-                restart_text = self.font.render("Press R to restart", True, (255, 255, 255))
-            
-            text_rect = game_over_text.get_rect(center=(self.width//2, self.height//2))
-            restart_rect = restart_text.get_rect(center=(self.width//2, self.height//2 + 50))
-            
-            self.screen.blit(game_over_text, text_rect)
-            self.screen.blit(restart_text, restart_rect)
+        self.screen.blits(draws, False)
         
         # Update display
         pygame.display.flip()
+        self.lap('blit')
     
     def run(self):
         """Main game loop"""
+        if self.headless:
+            # No display or frame cap, just simulate until stopped
+            while self.running and not self.game_over:
+                if self.profiler:
+                    self.profiler.begin_frame()
+                    self.step()
+                    self.audio.flush()
+                    self.profiler.end_frame()
+                else:
+                    self.step()
+                    self.audio.flush()
+            self.save_replay()
+            self.save_profile()
+            self.release_engine()
+            return
+        
+        # Fixed-timestep loop: simulate in TICK_RATE steps, render in between
+        accumulator = 0.0
+        previous = time.perf_counter()
         while self.running:
+            now = time.perf_counter()
+            accumulator += now - previous
+            previous = now
+            if self.profiler:
+                self.profiler.begin_frame()
+            
             self.handle_events()
-            self.update()
-            self.render()
-            self.clock.tick(60)
-        
-        pygame.quit()
+            self.lap('events')
+            
+            ticks = 0
+            while accumulator >= self.tick_dt and ticks < MAX_CATCHUP_TICKS:
+                self.step()
+                accumulator -= self.tick_dt
+                ticks += 1
+            
+            # Too far behind, slow down instead of spiralling
+            if accumulator >= self.tick_dt:
+                accumulator = 0.0
+            
+            # Sounds from all of this frame's ticks start together
+            self.audio.flush()
+            self.lap('audio')
+            
+            self.render(accumulator / self.tick_dt)
+            self.clock.tick(self.max_fps)
+            if self.profiler:
+                self.lap('wait')
+                self.profiler.end_frame()
+        
+        self.save_replay()
+        self.save_profile()
+        self.release_engine()
+    
+    def release_engine(self):
+        """Shut down our own engine, or hide a shared one for the next game"""
+        if self.owns_engine:
+            self.engine.close()
+        else:
+            self.engine.detach()
+    
+    def save_replay(self):
+        """Write the recorded inputs to record_path, if recording"""
+        if self.recorder:
+            self.recorder.save(self.record_path)
+            print(f"Replay saved to {self.record_path} (seed {self.seed})")
+    
+    def save_profile(self):
+        """Write the frame records to profile_path, if profiling"""
+        if self.profiler and self.profile_path and self.profiler.frames:
+            self.profiler.export(self.profile_path)
+            frame = self.profiler.summary()['frame_ms']
+            print(f"Frame profile saved to {self.profile_path} "
+                  f"(p50 {frame['p50']:.2f} ms, p99 {frame['p99']:.2f} ms)")
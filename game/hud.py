@@ -0,0 +1,173 @@
+import pygame
+from collections import OrderedDict
+
+WHITE = (255, 255, 255)
+RED = (255, 0, 0)
+YELLOW = (255, 255, 0)
+
+OVERLAY_REFRESH = 0.5  # seconds between stats overlay updates
+
+def net_lines(stats):
+    """Text lines for the network overlay from GameClient.get_stats()"""
+    rtt = f"{stats['rtt_ms']:.0f} ms" if stats['rtt_ms'] is not None else "-"
+    return [
+        f"{stats['transport'].upper()}/{stats['codec']}  RTT {rtt}  "
+        f"send {stats['send_rate']:.0f}/s",
+        f"in {stats['messages_in_rate']:.0f} msg/s {stats['bytes_in_rate'] / 1024:.1f} kB/s  "
+        f"out {stats['messages_out_rate']:.0f} msg/s {stats['bytes_out_rate'] / 1024:.1f} kB/s",
+        f"queue {stats['send_backlog']} B  dropped {stats['dropped']}  "
+        f"malformed {stats['malformed']}",
+    ]
+
+class TextCache:
+    """LRU cache of rendered text surfaces keyed by (font, string, color)"""
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def render(self, font, text, color):
+        """Get the rendered surface for text, rasterizing it only on a miss"""
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+    
+    def get_stats(self):
+        """Get cache counters"""
+        return {
+            'size': len(self.surfaces),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+class DigitAtlas:
+    """Pre-rendered 0-9 glyphs so frequently changing numbers never re-rasterize"""
+    def __init__(self, font, color):
+        self.glyphs = [font.render(str(digit), True, color) for digit in range(10)]
+    
+    def draws(self, value, x, y):
+        """Get (glyph, position) pairs that spell out value starting at (x, y)"""
+        draws = []
+        for char in str(value):
+            glyph = self.glyphs[ord(char) - 48]
+            draws.append((glyph, (x, y)))
+            x += glyph.get_width()
+        return draws
+
+class Hud:
+    """Score, level, player indicator, health bar and game-over overlay"""
+    def __init__(self, font, big_font, width, height, use_digit_atlas=False, cache_size=64):
+        self.font = font
+        self.big_font = big_font
+        self.width = width
+        self.height = height
+        self.cache = TextCache(cache_size)
+        self.digits = DigitAtlas(font, WHITE) if use_digit_atlas else None
+        
+        # Last values drawn, so unchanged frames skip even the string formatting
+        self.score = None
+        self.level = None
+        self.score_draws = []
+        self.level_draws = []
+        self.health = None
+        self.health_bar = None
+        
+        # Stats overlays, re-rendered a couple of times a second at most
+        self.small_font = None
+        self.overlays = {}  # name -> (time built, draws)
+    
+    def number_line(self, label, value, y):
+        """Get the draws for a 'Label: value' line"""
+        if self.digits:
+            label_text = self.cache.render(self.font, label, WHITE)
+            return [(label_text, (10, y))] + self.digits.draws(value, 10 + label_text.get_width(), y)
+        return [(self.cache.render(self.font, f"{label}{value}", WHITE), (10, y))]
+    
+    def get_health_bar(self, health, max_health):
+        """Get the health bar surface, redrawn only when health changes"""
+        if self.health != (health, max_health):
+            health_pct = max(0, health) / max_health
+            self.health_bar = pygame.Surface((100, 20))
+            self.health_bar.fill(RED)
+            pygame.draw.rect(self.health_bar, (0, 255, 0), (0, 0, 100 * health_pct, 20))
+            self.health = (health, max_health)
+        return self.health_bar
+    
+    def build_overlay(self, name, now, get_lines, right=False):
+        """Get the draws for a block of stats text in a bottom corner
+        
+        get_lines is only called when the overlay is due for a refresh.
+        """
+        built = self.overlays.get(name)
+        if built and now - built[0] < OVERLAY_REFRESH:
+            return built[1]
+        if self.small_font is None:
+            self.small_font = pygame.font.Font(None, 22)
+        
+        # Freshly formatted every time, so render directly rather than filling the cache
+        lines = get_lines()
+        y = self.height - 10 - 20 * len(lines)
+        draws = []
+        for line in lines:
+            text = self.small_font.render(line, True, YELLOW)
+            x = self.width - 10 - text.get_width() if right else 10
+            draws.append((text, (x, y)))
+            y += 20
+        self.overlays[name] = (now, draws)
+        return draws
+    
+    def build_net_overlay(self, client, now):
+        """Get the draws for the network stats overlay (bottom left)"""
+        return self.build_overlay('net', now, lambda: net_lines(client.get_stats()))
+    
+    def build_profile_overlay(self, profiler, now):
+        """Get the draws for the frame profiler overlay (bottom right)"""
+        return self.build_overlay('profile', now, profiler.overlay_lines, right=True)
+    
+    def build(self, game):
+        """Get every HUD (surface, position) pair for this frame"""
+        if game.score != self.score:
+            self.score_draws = self.number_line("Score: ", game.score, 10)
+            self.score = game.score
+        if game.level != self.level:
+            self.level_draws = self.number_line("Level: ", game.level, 50)
+            self.level = game.level
+        
+        draws = self.score_draws + self.level_draws
+        
+        # Player indicator in multiplayer
+        if game.multiplayer:
+            player_text = self.cache.render(self.font, f"You are Player {game.player_id + 1}", WHITE)
+            draws.append((player_text, (10, 90)))
+        
+        # Health bar
+        draws.append((self.get_health_bar(game.player.health, game.player.max_health),
+                      (self.width - 110, 10)))
+        
+        # Game over
+        if game.game_over:
+            game_over_text = self.cache.render(self.big_font, "GAME OVER", RED)
+            
+            if game.multiplayer:
+                restart_text = self.cache.render(self.font, "Press ESC to exit", WHITE)
+            else:
+                restart_text = self.cache.render(self.font, "Press R to restart", WHITE)
+            
+            text_rect = game_over_text.get_rect(center=(self.width//2, self.height//2))
+            restart_rect = restart_text.get_rect(center=(self.width//2, self.height//2 + 50))
+            
+            draws.append((game_over_text, text_rect))
+            draws.append((restart_text, restart_rect))
+        
+        return draws
@@ -0,0 +1,37 @@
+from pygame.locals import K_LEFT, K_RIGHT, K_a, K_d
+
+# Button bits sent to an authoritative server, one byte per tick
+INPUT_LEFT = 0x01
+INPUT_RIGHT = 0x02
+INPUT_FIRE = 0x04
+
+def buttons_from_keys(keys, fire=False):
+    """Pack held movement keys (and a fire press) into button bits"""
+    buttons = 0
+    if keys[K_LEFT] or keys[K_a]:
+        buttons |= INPUT_LEFT
+    if keys[K_RIGHT] or keys[K_d]:
+        buttons |= INPUT_RIGHT
+    if fire:
+        buttons |= INPUT_FIRE
+    return buttons
+
+class KeyState:
+    """Injected keyboard state that stands in for pygame.key.get_pressed()"""
+    def __init__(self, held=()):
+        self.held = set(held)
+    
+    def __getitem__(self, key):
+        return key in self.held
+    
+    def hold(self, key):
+        """Mark a key as held down"""
+        self.held.add(key)
+    
+    def release(self, key):
+        """Mark a key as released"""
+        self.held.discard(key)
+    
+    def set(self, held):
+        """Replace the full set of held keys"""
+        self.held = set(held)
@@ -1,19 +1,21 @@
 import pygame
 from pygame.locals import *
 
+from game.assets import assets
+
+def _default_image():
+    """Create a default player ship if image can't be loaded"""
+    image = pygame.Surface((50, 40), pygame.SRCALPHA)
+    pygame.draw.polygon(image, (0, 128, 255), [(0, 40), (25, 0), (50, 40)])
+    pygame.draw.rect(image, (100, 100, 100), (15, 25, 20, 15))
+    return image
+
 class Player(pygame.sprite.Sprite):
     def __init__(self, x, y):
         super().__init__()
         
-        # Load player image
-        try:
-            self.image = pygame.image.load("assets/images/player.png").convert_alpha()
-            self.image = pygame.transform.scale(self.image, (64, 64))
-        except:
-            # Create a default player ship if image can't be loaded
-            self.image = pygame.Surface((50, 40), pygame.SRCALPHA)
-            pygame.draw.polygon(self.image, (0, 128, 255), [(0, 40), (25, 0), (50, 40)])
-            pygame.draw.rect(self.image, (100, 100, 100), (15, 25, 20, 15))
+        # Load player image (shared, copy before drawing on it)
+        self.image = assets.get_image("assets/images/player.png", (64, 64), _default_image)
         
         self.rect = self.image.get_rect()
         self.rect.centerx = x
@@ -0,0 +1,78 @@
+import pygame
+
+class PooledSprite(pygame.sprite.Sprite):
+    """Sprite that returns itself to its pool when killed
+
+    Subclasses define reset(), taking the constructor's arguments, to
+    reinitialize a recycled sprite.
+    """
+    pool = None
+    pooled = False
+    prev_pos = None  # Position before the last tick, for render interpolation
+    
+    def kill(self):
+        super().kill()
+        if self.pool is not None:
+            self.pool.release(self)
+
+class SpritePool:
+    """Free list of reusable sprites so spawning doesn't allocate"""
+    def __init__(self, factory, capacity=64):
+        self.factory = factory
+        self.capacity = capacity  # Most idle sprites kept for reuse
+        self.free = []
+        self.in_use = 0
+        self.high_water = 0
+        self.created = 0
+        self.reused = 0
+        self.dropped = 0
+    
+    def acquire(self, *args):
+        """Get a sprite initialized with args, recycling a released one if possible"""
+        if self.free:
+            sprite = self.free.pop()
+            sprite.reset(*args)
+            self.reused += 1
+        else:
+            sprite = self.factory(*args)
+            sprite.pool = self
+            self.created += 1
+        
+        sprite.pooled = False
+        sprite.prev_pos = None  # Don't interpolate from where it was last alive
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return sprite
+    
+    def release(self, sprite):
+        """Give a sprite back to the pool (called by PooledSprite.kill)"""
+        if sprite.pooled:
+            return
+        sprite.pooled = True
+        self.in_use -= 1
+        if len(self.free) < self.capacity:
+            self.free.append(sprite)
+        else:
+            self.dropped += 1
+    
+    def preallocate(self, count, *args):
+        """Create idle sprites up front so the first spawns don't allocate either"""
+        while len(self.free) < min(count, self.capacity):
+            sprite = self.factory(*args)
+            sprite.pool = self
+            sprite.pooled = True
+            self.created += 1
+            self.free.append(sprite)
+    
+    def get_stats(self):
+        """Get pool usage counters"""
+        return {
+            'capacity': self.capacity,
+            'in_use': self.in_use,
+            'free': len(self.free),
+            'high_water': self.high_water,
+            'created': self.created,
+            'reused': self.reused,
+            'dropped': self.dropped
+        }
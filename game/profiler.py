@@ -0,0 +1,124 @@
+import csv
+import json
+import time
+from collections import deque
+
+MAX_FRAMES = 3600  # Frame records kept, a minute at 60 fps; older ones roll off
+HISTOGRAM_BUCKET = 1.0  # ms per frame-time histogram bucket
+HISTOGRAM_BUCKETS = 50  # The last bucket also counts every longer frame
+PERCENTILES = (50, 95, 99)
+OVERLAY_FRAMES = 300  # The overlay summarizes only the most recent frames
+
+def no_lap(phase):
+    """Stands in for FrameProfiler.lap while profiling is off"""
+    pass
+
+def percentile(values, pct):
+    """The pct-th percentile of a sorted list"""
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+class FrameProfiler:
+    """Per-phase timings for every frame, with a rolling frame-time histogram
+
+    The game loop brackets each frame with begin_frame() and end_frame(), and
+    code inside marks the end of each phase with lap(name): the time since the
+    previous lap is charged to that phase. Phases that run several times in a
+    frame (catch-up ticks) add up.
+    """
+    def __init__(self, max_frames=MAX_FRAMES):
+        self.frames = deque(maxlen=max_frames)  # (frame number, total, {phase: seconds})
+        self.phases = []  # Every phase seen, in first-seen order
+        self.histogram = [0] * HISTOGRAM_BUCKETS  # Frame counts for the frames kept
+        self.frame_count = 0
+        self.current = {}
+        self.frame_start = self.last = time.perf_counter()
+    
+    def lap(self, phase):
+        """Charge the time since the previous lap to phase"""
+        now = time.perf_counter()
+        self.current[phase] = self.current.get(phase, 0.0) + now - self.last
+        self.last = now
+    
+    def begin_frame(self):
+        self.current = {}
+        self.frame_start = self.last = time.perf_counter()
+    
+    def end_frame(self):
+        """Record the frame that began at the last begin_frame()"""
+        total = time.perf_counter() - self.frame_start
+        if len(self.frames) == self.frames.maxlen:
+            self.histogram[self._bucket(self.frames[0][1])] -= 1
+        self.frame_count += 1
+        self.frames.append((self.frame_count, total, self.current))
+        self.histogram[self._bucket(total)] += 1
+        
+        for phase in self.current:
+            if phase not in self.phases:
+                self.phases.append(phase)
+        self.current = {}
+    
+    def _bucket(self, seconds):
+        return min(HISTOGRAM_BUCKETS - 1, int(seconds * 1000 / HISTOGRAM_BUCKET))
+    
+    def summary(self, last=None):
+        """Frame time and per-phase statistics over the frames kept (or the last few)"""
+        frames = list(self.frames)[-last:] if last else self.frames
+        count = len(frames)
+        if not count:
+            return {'frames': 0}
+        summary = {
+            'frames': count,
+            'frame_ms': self._stats([total for _, total, _ in frames]),
+            'phases': {},
+            'histogram': {'bucket_ms': HISTOGRAM_BUCKET, 'counts': list(self.histogram)}
+        }
+        summary['fps'] = round(1000 / summary['frame_ms']['mean'], 1)
+        for phase in self.phases:
+            summary['phases'][phase] = self._stats([phases.get(phase, 0.0)
+                                                    for _, _, phases in frames])
+        return summary
+    
+    def _stats(self, values):
+        """Mean, percentiles and max of a list of seconds, in ms"""
+        values = sorted(values)
+        stats = {'mean': round(sum(values) / len(values) * 1000, 3)}
+        for pct in PERCENTILES:
+            stats[f'p{pct}'] = round(percentile(values, pct) * 1000, 3)
+        stats['max'] = round(values[-1] * 1000, 3)
+        return stats
+    
+    def overlay_lines(self):
+        """Short text lines for the in-game overlay"""
+        summary = self.summary(OVERLAY_FRAMES)
+        if not summary['frames']:
+            return ["No frames yet"]
+        frame = summary['frame_ms']
+        lines = [f"frame {frame['mean']:.2f} ms  p50 {frame['p50']:.2f}  "
+                 f"p95 {frame['p95']:.2f}  p99 {frame['p99']:.2f}"]
+        phases = sorted(summary['phases'].items(), key=lambda item: -item[1]['mean'])
+        for phase, stats in phases:
+            lines.append(f"{phase} {stats['mean']:.2f} ms  p99 {stats['p99']:.2f}")
+        return lines
+    
+    def records(self):
+        """Every frame kept as a flat dict of milliseconds"""
+        records = []
+        for frame, total, phases in self.frames:
+            record = {'frame': frame, 'total_ms': round(total * 1000, 4)}
+            for phase in self.phases:
+                record[f'{phase}_ms'] = round(phases.get(phase, 0.0) * 1000, 4)
+            records.append(record)
+        return records
+    
+    def export(self, path):
+        """Write the frame records to path, as CSV if it ends in .csv, otherwise JSON"""
+        records = self.records()
+        if path.endswith('.csv'):
+            fields = ['frame', 'total_ms'] + [f'{phase}_ms' for phase in self.phases]
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fields)
+                writer.writeheader()
+                writer.writerows(records)
+        else:
+            with open(path, 'w') as f:
+                json.dump({'summary': self.summary(), 'frames': records}, f, indent=1)
@@ -0,0 +1,65 @@
+import pygame
+
+class DirtyRectRenderer:
+    """Redraws and pushes only the screen areas that changed since the last frame"""
+    def __init__(self, screen, background=None, fill_color=(135, 206, 235), threshold=0.5):
+        self.screen = screen
+        self.background = background
+        self.fill_color = fill_color
+        self.threshold = threshold  # Fraction of the screen that forces a full flip
+        self.screen_rect = screen.get_rect()
+        self.previous_rects = []
+        self.full_redraw = True
+        
+        # Counters so we can see how often the fast path is taken
+        self.full_frames = 0
+        self.partial_frames = 0
+        self.dirty_pixels = 0
+    
+    def invalidate(self):
+        """Force a full redraw on the next frame (e.g. after the window was exposed)"""
+        self.full_redraw = True
+    
+    def clear(self, rect):
+        """Restore the background under rect"""
+        if self.background:
+            self.screen.blit(self.background, rect, rect)
+        else:
+            self.screen.fill(self.fill_color, rect)
+    
+    def draw(self, draws):
+        """Draw a list of (surface, position) pairs and update the display"""
+        rects = []
+        for surface, pos in draws:
+            rect = pygame.Rect(pos[0], pos[1], *surface.get_size()).clip(self.screen_rect)
+            if rect.width and rect.height:
+                rects.append(rect)
+        
+        # Old positions must be wiped, new ones painted
+        dirty = self.previous_rects + rects
+        self.previous_rects = rects
+        area = sum(rect.width * rect.height for rect in dirty)
+        
+        if self.full_redraw or area > self.threshold * self.screen_rect.width * self.screen_rect.height:
+            self.clear(self.screen_rect)
+            self.screen.blits(draws, False)
+            pygame.display.flip()
+            self.full_redraw = False
+            self.full_frames += 1
+            self.dirty_pixels += self.screen_rect.width * self.screen_rect.height
+            return
+        
+        for rect in dirty:
+            self.clear(rect)
+        self.screen.blits(draws, False)
+        pygame.display.update(dirty)
+        self.partial_frames += 1
+        self.dirty_pixels += area
+    
+    def get_stats(self):
+        """Get frame counters for the full and partial paths"""
+        return {
+            'full_frames': self.full_frames,
+            'partial_frames': self.partial_frames,
+            'dirty_pixels': self.dirty_pixels
+        }
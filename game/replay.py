@@ -0,0 +1,179 @@
+"""Input recording and headless replay
+
+A replay is the game's seed and difficulty plus one byte of input per tick,
+with a state checksum every CHECKSUM_INTERVAL ticks. Re-simulating it with
+run_replay() must hit every checksum, otherwise the simulation isn't
+deterministic any more (or the recording came from different code).
+
+    python -m game.replay session.skyr
+"""
+import struct
+import sys
+import time
+import zlib
+
+from pygame.locals import K_LEFT, K_RIGHT, K_SPACE, K_r
+
+from game.input import INPUT_LEFT, INPUT_RIGHT, buttons_from_keys
+
+REPLAY_MAGIC = b'SKYR'
+REPLAY_VERSION = 1
+
+# magic, version, seed, difficulty, tick count, checksum interval; then a
+# zlib-compressed body of the input bytes followed by the '!I' checksums
+REPLAY_HEADER = struct.Struct('!4sBIBIH')
+DIFFICULTIES = ('easy', 'normal', 'hard')
+CHECKSUM_INTERVAL = 60  # Ticks between state checksums (one per second)
+
+# Input byte: held movement keys (game.input bits), restart pressed, and how
+# many times fire was pressed in the high nibble
+INPUT_RESTART = 0x08
+FIRE_SHIFT = 4
+MAX_FIRES = 15
+
+class ReplayError(Exception):
+    """Raised for files that aren't replays this version can read"""
+    pass
+
+def encode_tick(keys, presses):
+    """Pack one tick's held keys and key presses into a byte"""
+    fires = min(MAX_FIRES, presses.count(K_SPACE))
+    restart = INPUT_RESTART if K_r in presses else 0
+    return buttons_from_keys(keys) | restart | (fires << FIRE_SHIFT)
+
+def decode_tick(value):
+    """Unpack an input byte into (held keys, key presses)"""
+    held = set()
+    if value & INPUT_LEFT:
+        held.add(K_LEFT)
+    if value & INPUT_RIGHT:
+        held.add(K_RIGHT)
+    presses = [K_r] if value & INPUT_RESTART else []
+    presses += [K_SPACE] * (value >> FIRE_SHIFT)
+    return held, presses
+
+def state_checksum(game):
+    """CRC32 of everything the simulation decides: score, health, every sprite position"""
+    values = [game.tick_count, game.score, game.level, game.player.health, int(game.game_over),
+              game.player.rect.x, game.player.rect.y]
+    for group in (game.enemies, game.bullets, game.clouds):
+        values.append(len(group))
+        for x, y in sorted(sprite.rect.topleft for sprite in group):
+            values += (x, y)
+    return zlib.crc32(struct.pack(f'!{len(values)}i', *values))
+
+class ReplayRecorder:
+    """Collects a game's per-tick inputs and checksums, then writes the replay file"""
+    def __init__(self, seed, difficulty='normal', checksum_interval=CHECKSUM_INTERVAL):
+        self.seed = seed
+        self.difficulty = difficulty
+        self.checksum_interval = checksum_interval
+        self.inputs = bytearray()
+        self.checksums = []
+    
+    def record(self, keys, presses):
+        """Add the input for the next tick"""
+        self.inputs.append(encode_tick(keys, presses))
+    
+    def checkpoint(self, checksum):
+        """Add the state checksum for the current checksum tick"""
+        self.checksums.append(checksum)
+    
+    def to_bytes(self):
+        header = REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed,
+                                    DIFFICULTIES.index(self.difficulty), len(self.inputs),
+                                    self.checksum_interval)
+        body = bytes(self.inputs) + struct.pack(f'!{len(self.checksums)}I', *self.checksums)
+        return header + zlib.compress(body, 9)
+    
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+class Replay:
+    """A loaded replay file"""
+    def __init__(self, seed, difficulty, inputs, checksum_interval, checksums):
+        self.seed = seed
+        self.difficulty = difficulty
+        self.inputs = inputs
+        self.checksum_interval = checksum_interval
+        self.checksums = checksums
+    
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < REPLAY_HEADER.size:
+            raise ReplayError("Truncated replay header")
+        magic, version, seed, difficulty, ticks, interval = REPLAY_HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC:
+            raise ReplayError("Not a replay file")
+        if version != REPLAY_VERSION:
+            raise ReplayError(f"Unsupported replay version {version}")
+        try:
+            body = zlib.decompress(data[REPLAY_HEADER.size:])
+        except zlib.error as e:
+            raise ReplayError(f"Corrupt replay body: {e}")
+        
+        count = (len(body) - ticks) // 4
+        checksums = list(struct.unpack_from(f'!{count}I', body, ticks))
+        return cls(seed, DIFFICULTIES[difficulty], body[:ticks], interval, checksums)
+    
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+def run_replay(replay, verify=True, stop_on_mismatch=True):
+    """Re-simulate a replay headlessly as fast as possible
+
+    Returns a dict with the ticks run, wall time, speed relative to real time
+    and the ticks whose checksum didn't match (empty when deterministic).
+    """
+    from game.game import Game, TICK_RATE
+    
+    if not isinstance(replay, Replay):
+        replay = Replay.load(replay)
+    
+    game = Game(replay.difficulty, headless=True, seed=replay.seed)
+    mismatches = []
+    start = time.perf_counter()
+    for value in replay.inputs:
+        held, presses = decode_tick(value)
+        game.set_held_keys(held)
+        for key in presses:
+            game.press_key(key)
+        game.step()
+        
+        tick = game.tick_count
+        if verify and tick % replay.checksum_interval == 0:
+            index = tick // replay.checksum_interval - 1
+            if index < len(replay.checksums) and state_checksum(game) != replay.checksums[index]:
+                mismatches.append(tick)
+                if stop_on_mismatch:
+                    break
+    elapsed = time.perf_counter() - start
+    
+    return {
+        'ticks': game.tick_count,
+        'seconds': elapsed,
+        'speedup': game.tick_count / TICK_RATE / elapsed if elapsed else 0.0,
+        'checksums': len(replay.checksums),
+        'mismatches': mismatches,
+        'score': game.score
+    }
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Usage: python -m game.replay REPLAY_FILE")
+        return 2
+    result = run_replay(argv[0])
+    print(f"{result['ticks']} ticks in {result['seconds']:.2f}s "
+          f"({result['speedup']:.0f}x real time), score {result['score']}")
+    if result['mismatches']:
+        print(f"DESYNC: checksum mismatch at tick {result['mismatches'][0]}")
+        return 1
+    print(f"All {result['checksums']} checksums match")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
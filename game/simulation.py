@@ -0,0 +1,211 @@
+import random
+from collections import deque
+
+import pygame
+
+from game.entity_store import BULLET, ENEMY, PLAYER
+from game.input import INPUT_FIRE, INPUT_LEFT, INPUT_RIGHT
+
+# Sprite sizes, matching the scaled images the clients draw
+PLAYER_SIZE = (64, 64)
+ENEMY_SIZE = (50, 50)
+BULLET_SIZE = (5, 15)
+PLAYER_SPEED = 7
+BULLET_SPEED = 10
+
+# difficulty -> (enemy speed, spawn rate in ticks, player health), as in Game
+DIFFICULTY = {
+    'easy': (2, 60, 5),
+    'normal': (3, 45, 3),
+    'hard': (5, 30, 2),
+}
+
+MAX_INPUTS_PER_TICK = 3  # Inputs a player may catch up on in one tick
+MAX_QUEUED_INPUTS = 60  # Older inputs are dropped beyond this
+FIRST_ENTITY_ID = 16  # Snapshot ids below this are player slots
+
+def spawn_position(slot, size, width=800, height=600):
+    """Center of a player's ship at the start of a match, spread along the bottom"""
+    return (width * (slot + 1) // (size + 1), height - 100)
+
+def apply_buttons(rect, buttons, width):
+    """Move a player rect for one tick of input, exactly as Player.update does"""
+    if buttons & INPUT_LEFT:
+        rect.x -= PLAYER_SPEED
+    if buttons & INPUT_RIGHT:
+        rect.x += PLAYER_SPEED
+    if rect.left < 0:
+        rect.left = 0
+    if rect.right > width:
+        rect.right = width
+
+class SimPlayer:
+    """A player slot in a match: position, health and inputs waiting to run"""
+    def __init__(self, slot, center, health):
+        self.slot = slot
+        self.rect = pygame.Rect((0, 0), PLAYER_SIZE)
+        self.rect.center = center
+        self.health = health
+        self.inputs = deque(maxlen=MAX_QUEUED_INPUTS)  # (seq, buttons), oldest first
+        self.last_seq = None  # Newest input applied
+        self.acked_seq = None  # Newest input reported back to the client
+    
+    @property
+    def alive(self):
+        return self.health > 0
+
+class MatchSimulation:
+    """The game rules for one match, run by the server without a display
+
+    Mirrors Game.update for every player in the room: enemies spawn and fall,
+    bullets fly, collisions cost health and earn score. Players are driven by
+    the button inputs their clients send, and the results are read back with
+    entities(), meta() and acks(). Uses its own seeded RNG and plain Rects so
+    matches don't share state or touch the sprite assets.
+    """
+    def __init__(self, size=2, difficulty='normal', seed=None, width=800, height=600):
+        self.size = size
+        self.width = width
+        self.height = height
+        self.rng = random.Random(seed)
+        self.enemy_speed, self.enemy_spawn_rate, self.max_health = DIFFICULTY[difficulty]
+        
+        self.players = [None] * size
+        self.enemies = {}  # id -> [rect, speed]
+        self.bullets = {}  # id -> [rect, speed]
+        self.next_id = FIRST_ENTITY_ID
+        
+        self.tick = 0
+        self.score = 0
+        self.level = 1
+        self.game_over = False
+        
+        # Same opening wave as a multiplayer Game
+        self.spawn_enemies(max(1, 5 // 2))
+    
+    def add_player(self, slot):
+        """Put a player in slot at its starting position"""
+        center = spawn_position(slot, self.size, self.width, self.height)
+        self.players[slot] = SimPlayer(slot, center, self.max_health)
+        self.game_over = False
+    
+    def remove_player(self, slot):
+        self.players[slot] = None
+    
+    def queue_inputs(self, slot, seq, inputs):
+        """Queue a client's inputs, newest (seq) last, skipping ones already queued"""
+        player = self.players[slot]
+        if player is None:
+            return
+        
+        newest = player.inputs[-1][0] if player.inputs else player.last_seq
+        first = seq - len(inputs) + 1
+        for i, buttons in enumerate(inputs):
+            input_seq = (first + i) & 0xFFFF
+            if newest is None or 0 < (input_seq - newest) & 0xFFFF < 0x8000:
+                player.inputs.append((input_seq, buttons))
+                newest = input_seq
+    
+    def spawn_enemies(self, count):
+        for _ in range(count):
+            rect = pygame.Rect((self.rng.randint(50, self.width - 50), self.rng.randint(-300, 0)),
+                               ENEMY_SIZE)
+            self.enemies[self.next_id] = [rect, self.enemy_speed]
+            self.next_id += 1
+    
+    def fire(self, player):
+        rect = pygame.Rect((0, 0), BULLET_SIZE)
+        rect.centerx = player.rect.centerx
+        rect.bottom = player.rect.top
+        self.bullets[self.next_id] = [rect, BULLET_SPEED]
+        self.next_id += 1
+    
+    def step(self):
+        """Advance the match one tick"""
+        self.tick += 1
+        if self.game_over:
+            return
+        
+        # Run each player's queued inputs
+        for player in self.players:
+            if player is None or not player.alive:
+                continue
+            for _ in range(min(MAX_INPUTS_PER_TICK, len(player.inputs))):
+                seq, buttons = player.inputs.popleft()
+                apply_buttons(player.rect, buttons, self.width)
+                if buttons & INPUT_FIRE:
+                    self.fire(player)
+                player.last_seq = seq
+        
+        # Enemies fall, and wrap back to the top once off screen
+        for rect, speed in self.enemies.values():
+            rect.y += speed
+            if rect.top > self.height:
+                rect.y = self.rng.randint(-100, -40)
+                rect.x = self.rng.randint(0, self.width - rect.width)
+        
+        for bullet_id, (rect, speed) in list(self.bullets.items()):
+            rect.y -= speed
+            if rect.bottom < 0 or rect.top > self.height:
+                del self.bullets[bullet_id]
+        
+        # Bullets destroy every enemy they touch
+        for bullet_id, (rect, _) in list(self.bullets.items()):
+            hits = [enemy_id for enemy_id, (enemy, _) in self.enemies.items()
+                    if rect.colliderect(enemy)]
+            if hits:
+                del self.bullets[bullet_id]
+                for enemy_id in hits:
+                    del self.enemies[enemy_id]
+                    self.score += 10
+        
+        # Enemies that reach a player cost one health per tick
+        for player in self.players:
+            if player is None or not player.alive:
+                continue
+            hits = [enemy_id for enemy_id, (enemy, _) in self.enemies.items()
+                    if player.rect.colliderect(enemy)]
+            if hits:
+                for enemy_id in hits:
+                    del self.enemies[enemy_id]
+                player.health -= 1
+        
+        present = [player for player in self.players if player]
+        if present and not any(player.alive for player in present):
+            self.game_over = True
+        
+        if len(self.enemies) < 5 + self.level and self.rng.randint(0, self.enemy_spawn_rate) == 0:
+            self.spawn_enemies(1)
+        
+        # Level up every 200 points
+        if self.score > 0 and self.score // 200 > self.level - 1:
+            self.level += 1
+            self.enemy_speed += 0.5
+    
+    def entities(self):
+        """Everything in the world as {id: (kind, x, y)}, top-left corners in pixels"""
+        entities = {}
+        for player in self.players:
+            if player and player.alive:
+                entities[player.slot] = (PLAYER, player.rect.x, player.rect.y)
+        for enemy_id, (rect, _) in self.enemies.items():
+            entities[enemy_id] = (ENEMY, rect.x, rect.y)
+        for bullet_id, (rect, _) in self.bullets.items():
+            entities[bullet_id] = (BULLET, rect.x, rect.y)
+        return entities
+    
+    def meta(self):
+        """Score, level, each slot's health and the game over flag"""
+        meta = {'score': self.score, 'level': self.level, 'game_over': int(self.game_over)}
+        for slot, player in enumerate(self.players):
+            meta[f'health{slot}'] = player.health if player else 0
+        return meta
+    
+    def acks(self):
+        """New {slot: (seq, x, y)} results since the last call, player centers in pixels"""
+        acks = {}
+        for player in self.players:
+            if player and player.last_seq is not None and player.last_seq != player.acked_seq:
+                player.acked_seq = player.last_seq
+                acks[player.slot] = (player.last_seq, player.rect.centerx, player.rect.centery)
+        return acks
@@ -1,7 +1,32 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import os
-from PIL import Image, ImageTk
+
+BACKGROUND_PATH = "assets/images/menu_bg.jpg"
+BACKGROUND_CACHE = "assets/cache/menu_bg_{}x{}.ppm"
+
+def load_background(path, size):
+    """Get a PhotoImage of path at exactly size
+    
+    The resized image is kept as a PPM that Tk reads by itself, so PIL is
+    only imported (and the resize only done) when the source image changes.
+    """
+    cache_path = BACKGROUND_CACHE.format(*size)
+    try:
+        fresh = os.path.getmtime(cache_path) >= os.path.getmtime(path)
+    except OSError:
+        fresh = False
+    
+    if not fresh:
+        from PIL import Image
+        image = Image.open(path).convert('RGB')
+        if image.size != size:
+            image = image.resize(size, Image.LANCZOS)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = cache_path + ".tmp"
+        image.save(temp_path, format='PPM')
+        os.replace(temp_path, cache_path)
+    return tk.PhotoImage(file=cache_path)
 
 class MainMenu:
     def __init__(self, master, start_game_callback, start_multiplayer_callback):
@@ -25,9 +50,7 @@ class MainMenu:
             # Create directories if they don't exist
             os.makedirs("assets/images", exist_ok=True)
             
-            self.bg_image = Image.open("assets/images/menu_bg.jpg")
-            self.bg_image = self.bg_image.resize((800, 600), Image.LANCZOS)
-            self.bg_photo = ImageTk.PhotoImage(self.bg_image)
+            self.bg_photo = load_background(BACKGROUND_PATH, (800, 600))
             self.bg_label = tk.Label(self.frame, image=self.bg_photo)
             self.bg_label.place(x=0, y=0, relwidth=1, relheight=1)
         except Exception as e:
@@ -90,7 +113,7 @@ class MainMenu:
         """Open dialog to join a multiplayer game"""
         join_window = tk.Toplevel(self.master)
         join_window.title("Join Multiplayer Game")
-        join_window.geometry("400x200")
+        join_window.geometry("400x240")
         join_window.transient(self.master)
         join_window.grab_set()
         
@@ -103,12 +126,22 @@ class MainMenu:
         ip_entry = ttk.Entry(ip_frame, textvariable=ip_var, width=20)
         ip_entry.pack(side=tk.LEFT, padx=10)
         
+        # Add room name input
+        room_frame = ttk.Frame(join_window)
+        room_frame.pack(padx=20, fill=tk.X)
+        
+        ttk.Label(room_frame, text="Room:").pack(side=tk.LEFT)
+        room_var = tk.StringVar(value="default")
+        room_entry = ttk.Entry(room_frame, textvariable=room_var, width=20)
+        room_entry.pack(side=tk.LEFT, padx=10)
+        
         # Connect button
         def connect():
             server_ip = ip_var.get()
+            room = room_var.get().strip() or "default"
             join_window.destroy()
-            self.start_multiplayer_callback(server_ip, False)
-            
+            self.start_multiplayer_callback(server_ip, False, room)
+        
         ttk.Button(join_window, text="Connect", 
                  command=connect).pack(pady=20)
         
@@ -1,14 +1,18 @@
+import time
+STARTED = time.perf_counter()  # Startup report times are measured from here
+
 import os
 import sys
 import tkinter as tk
-import pygame
 
 # Add the project root to the path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# Only the menu is imported up front. pygame, the game and the network code
+# load when a game mode is picked, so the menu appears without waiting for them.
 from gui.menu import MainMenu
-from game.game import Game
-from network.client import GameClient
+
+IMPORTED = time.perf_counter()
 
 # Create required directories
 def create_asset_directories():
@@ -16,7 +20,10 @@ def create_asset_directories():
     os.makedirs("assets/sounds", exist_ok=True)
 
 class SkyWarr:
-    def __init__(self):
+    def __init__(self, startup_report=False):
+        self.startup_report = startup_report  # Print the time to menu and exit
+        self.startup_times = {'imports': IMPORTED - STARTED}
+        
         # Create directories
         create_asset_directories()
         
@@ -34,13 +41,21 @@ class SkyWarr:
         
         # Initialize main menu
         self.main_menu = MainMenu(self.root, self.start_game, self.start_multiplayer)
-        
-        # Initialize pygame
-        pygame.init()
+        self.startup_times['init'] = time.perf_counter() - IMPORTED
         
         # Game instance (will be created when game starts)
         self.game = None
         self.client = None
+        
+        # pygame session shared by every game, started with the first one
+        self.engine = None
+    
+    def get_engine(self):
+        """The shared engine, started on first use"""
+        if self.engine is None:
+            from game.engine import Engine
+            self.engine = Engine()
+        return self.engine
     
     def start_game(self, difficulty="normal"):
         """Start the single-player game with the selected difficulty"""
@@ -48,19 +63,23 @@ class SkyWarr:
         self.root.withdraw()
         
         # Start the game
-        self.game = Game(difficulty)
+        from game.game import Game
+        self.game = Game(difficulty, engine=self.get_engine())
         self.game.run()
         
         # When game ends, show Tkinter window again
         self.root.deiconify()
     
-    def start_multiplayer(self, server_address, is_host=False):
+    def start_multiplayer(self, server_address, is_host=False, room="default"):
         """Start a multiplayer game"""
         # Hide Tkinter window
         self.root.withdraw()
         
         # Create network client
-        self.client = GameClient(server_address)
+        engine = self.get_engine()
+        from game.game import Game
+        from network.client import GameClient
+        self.client = GameClient(server_address, room=room)
         
         if is_host and server_address == "localhost":
             # Import here to avoid circular import
@@ -71,7 +90,8 @@ class SkyWarr:
         # Try to connect
         if self.client.connect():
             # Start the game in multiplayer mode
-            self.game = Game("normal", multiplayer=True, client=self.client)
+            self.game = Game("normal", multiplayer=True, client=self.client,
+                             engine=engine)
             self.game.run()
         else:
             # Connection failed
@@ -82,13 +102,25 @@ class SkyWarr:
     
     def run(self):
         """Run the main application loop"""
+        self.root.after_idle(self.menu_shown)
         self.root.mainloop()
+        if self.engine:
+            self.engine.close()
+    
+    def menu_shown(self):
+        """Called once the menu has been drawn for the first time"""
+        self.startup_times['first_paint'] = time.perf_counter() - STARTED
+        if self.startup_report:
+            times = self.startup_times
+            print(f"Startup: imports {times['imports'] * 1000:.0f} ms, "
+                  f"init {times['init'] * 1000:.0f} ms, "
+                  f"menu shown after {times['first_paint'] * 1000:.0f} ms")
+            self.root.quit()
 
 def main():
     """Entry point function for pip installation"""
-    app = SkyWarr()
+    app = SkyWarr(startup_report='--startup-report' in sys.argv[1:])
     app.run()
 
 if __name__ == "__main__":
-    app = SkyWarr()
-    app.run()
+    main()
@@ -1,46 +1,143 @@
 import socket
-import json
+import struct
 import threading
 import time
 import queue
+from collections import deque
+
+try:
+    import fcntl
+    import termios
+except ImportError:
+    fcntl = None
+
+from network.protocol import PROTOCOL_VERSION, CODECS, StreamDecoder, encode_json
+from network.udp import LossyLink, UdpPeer, seq_newer
+from network.snapshot import SnapshotDecoder
+from network.interpolation import InterpolationBuffer, PredictionBuffer, SnapshotBuffer
+from network.stats import TrafficStats
+
+# Adaptive send rate tuning
+PING_INTERVAL = 1.0  # seconds between RTT probes
+HIGH_RTT = 0.15  # Back off above this round trip time (seconds)
+LOW_RTT = 0.08  # Speed back up below this one
+BACKLOG_LIMIT = 4096  # Unsent bytes in the socket that count as congestion
+MAX_UNACKED_INPUTS = 32  # Inputs repeated in every packet until the server acks them
 
 class GameClient:
-    def __init__(self, server_address):
+    def __init__(self, server_address, codec='binary', send_rate=30, min_send_rate=10,
+                 room='default', transport='tcp', simulated_loss=0.0, simulated_latency=0.0):
         self.server_address = server_address
         self.port = 5555
+        self.transport = transport  # 'tcp', or 'udp' for unreliable state plus reliable events
+        self.udp = None
+        self.simulated_loss = simulated_loss  # UDP only, applied in both directions
+        self.simulated_latency = simulated_latency
+        self.room = room  # Created on the server if it doesn't exist yet
+        self.rooms = {}  # Last lobby listing, room name -> player count
+        self.codec = codec  # Preferred wire codec, the server may fall back to JSON
+        self.encode = encode_json
+        self.decoder = StreamDecoder()
         self.socket = None
         self.connected = False
         self.player_id = None
-        self.remote_position = (0, 0)
+        self.remote_position = (0, 0)  # Last position received
+        self.remote_buffer = InterpolationBuffer()  # Received positions, for smooth rendering
+        self.prediction = PredictionBuffer()  # Our predicted positions awaiting server acks
+        self.input_seq = 0
+        self.unacked_inputs = deque()  # (seq, buttons) not yet acked by the server
+        self.acked_input_seq = None
+        self.last_sent_input = None
         self.remote_bullets = queue.Queue()
+        self.snapshots = SnapshotDecoder()  # World state streamed by the server
+        self.world = SnapshotBuffer()  # Decoded snapshots, for smooth rendering
+        self.authoritative = False  # Server runs the match, we only send inputs
+        self.spawn_position = None  # Where the server put our player
         self.receive_thread = None
         self.running = False
+        
+        # The receive thread answers pings and acks snapshots while the game
+        # thread sends, and one frame must go out whole before the next starts
+        self.send_lock = threading.Lock()
+        
+        # Outgoing state is coalesced into one packet per network tick
+        self.max_send_rate = send_rate  # packets per second
+        self.min_send_rate = min_send_rate
+        self.send_rate = send_rate  # Current rate, lowered under congestion
+        self.pending_position = None
+        self.pending_seq = 0
+        self.last_sent_position = None
+        self.position_moving = False
+        self.pending_events = []
+        self.last_send_time = 0.0
+        self.last_ping_time = 0.0
+        self.rtt = None  # Smoothed round trip time in seconds
+        self.stats = TrafficStats()  # Messages and bytes each way
     
     def connect(self):
         """Connect to the game server"""
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.connect((self.server_address, self.port))
+            if self.transport == 'udp':
+                self._open_udp()
+            else:
+                self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                self.socket.connect((self.server_address, self.port))
             
-            # Get our player ID
-            data = self.socket.recv(1024)
-            response = json.loads(data.decode('utf-8'))
+            # Negotiate the codec and get our player ID
+            offered = [self.codec] + [name for name in CODECS if name != self.codec]
+            hello = {
+                'type': 'hello',
+                'version': PROTOCOL_VERSION,
+                'codecs': offered,
+                'room': self.room
+            }
+            if self.udp:
+                self.udp.send_reliable(hello)
+            else:
+                self.socket.sendall(encode_json(hello))
+            response = self._receive_welcome()
+            if 'error' in response:
+                raise Exception(response['error'])
             self.player_id = response.get('player_id')
+            self.authoritative = response.get('simulated', False)
+            spawn = response.get('spawn')
+            self.spawn_position = tuple(spawn) if spawn else None
+            self.encode = CODECS[response.get('codec', 'json')]
+            if self.udp:
+                self.udp.encode = self.encode
             
-            # Start receive thread
+            # Start receive thread (connected first, the loop checks it)
             self.running = True
+            self.connected = True
             self.receive_thread = threading.Thread(target=self._receive_loop)
             self.receive_thread.daemon = True
             self.receive_thread.start()
             
-            print(f"Connected to server as Player {self.player_id + 1}")
-            self.connected = True
+            print(f"Connected to room {self.room} as Player {self.player_id + 1}")
             return True
-            
+        
         except Exception as e:
             print(f"Connection error: {e}")
             return False
     
+    def _open_udp(self):
+        """Set up the UDP socket and channel state, with simulated conditions if asked"""
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.connect((self.server_address, self.port))
+        self.socket.settimeout(0.05)  # Wake up regularly to resend unacked datagrams
+        
+        udp_socket = self.socket
+        def sendto(data, address):
+            self.stats.record_out(len(data))
+            udp_socket.send(data)
+        self.incoming = None
+        if self.simulated_loss or self.simulated_latency:
+            sendto = LossyLink(sendto, self.simulated_loss, self.simulated_latency)
+            self.incoming = LossyLink(lambda data, address: self._receive_datagram(data),
+                                      self.simulated_loss, self.simulated_latency)
+        self.udp = UdpPeer(sendto)
+        self.udp_inbox = queue.Queue()
+    
     def disconnect(self):
         """Disconnect from the server"""
         self.running = False
@@ -63,40 +160,185 @@ class GameClient:
             return False
         
         try:
-            message = json.dumps(message_dict)
-            self.socket.send(message.encode('utf-8'))
+            with self.send_lock:
+                if self.udp:
+                    self.udp.send(message_dict)
+                    self.stats.record_out(0, 1)
+                else:
+                    data = self.encode(message_dict)
+                    self.socket.sendall(data)
+                    self.stats.record_out(len(data), 1)
             return True
         except Exception as e:
+            self.stats.dropped += 1
             print(f"Send error: {e}")
             self.connected = False
             return False
     
     def send_position(self, x, y):
-        """Send player position to server"""
-        return self.send_message({
-            'type': 'position',
-            'x': x,
-            'y': y
-        })
+        """Queue player position for the next state packet
+        
+        Each call is one input tick: the position is recorded as our prediction
+        for that input so a server ack can correct it later.
+        """
+        self.input_seq = (self.input_seq + 1) & 0xFFFF
+        self.prediction.record(self.input_seq, x, y)
+        self.pending_position = (x, y)
+        self.pending_seq = self.input_seq
+        return self.connected
+    
+    def send_input(self, buttons, x, y):
+        """Queue one tick of button input for an authoritative server
+        
+        x, y is where the input left our player locally, recorded as the
+        prediction the server's ack is checked against.
+        """
+        self.input_seq = (self.input_seq + 1) & 0xFFFF
+        self.prediction.record(self.input_seq, x, y)
+        self.unacked_inputs.append((self.input_seq, buttons))
+        if len(self.unacked_inputs) > MAX_UNACKED_INPUTS:
+            self.unacked_inputs.popleft()
+        return self.connected
     
     def send_bullet(self):
-        """Send bullet fired event"""
-        return self.send_message({
+        """Queue bullet fired event for the next state packet"""
+        self.pending_events.append({
             'type': 'bullet',
             'x': -1,  # Server will use current player position
             'y': -1
         })
+        return self.connected
     
     def send_game_over(self):
-        """Send game over notification"""
-        return self.send_message({
+        """Send game over notification right away, with anything still queued"""
+        self.pending_events.append({
             'type': 'game_over'
         })
+        return self.flush()
+    
+    def pump(self, now=None):
+        """Send a state packet if a network tick is due, call once per game tick"""
+        if not self.connected:
+            return False
+        if now is None:
+            now = time.perf_counter()
+        
+        if now - self.last_ping_time >= PING_INTERVAL:
+            self.last_ping_time = now
+            self.send_message({'type': 'ping', 't': now})
+        
+        if now - self.last_send_time < 1.0 / self.send_rate:
+            return False
+        return self.flush(now)
+    
+    def flush(self, now=None):
+        """Send everything queued since the last packet: unacked inputs, then one state message"""
+        messages = []
+        
+        # Every input the server hasn't acked rides along, so a lost packet costs nothing
+        acked = self.acked_input_seq
+        while (acked is not None and self.unacked_inputs
+               and not seq_newer(self.unacked_inputs[0][0], acked)):
+            self.unacked_inputs.popleft()
+        if self.unacked_inputs and self.unacked_inputs[-1][0] != self.last_sent_input:
+            self.last_sent_input = self.unacked_inputs[-1][0]
+            messages.append({
+                'type': 'input',
+                'seq': self.last_sent_input,
+                'inputs': [buttons for _, buttons in self.unacked_inputs]
+            })
+        
+        message = {'type': 'state'}
+        moved = self.pending_position != self.last_sent_position
+        # Repeat the position once after stopping, so the other side sees zero
+        # velocity instead of extrapolating past where we stopped
+        if self.pending_position is not None and (moved or self.position_moving):
+            message['seq'] = self.pending_seq
+            message['x'], message['y'] = self.pending_position
+        if self.pending_events:
+            message['events'] = self.pending_events
+        if len(message) > 1:
+            if 'x' in message:
+                self.position_moving = moved
+            self.last_sent_position = self.pending_position
+            self.pending_events = []
+            messages.append(message)
+        
+        # Nothing changed, skip the packet entirely
+        if not messages:
+            return False
+        
+        self.last_send_time = time.perf_counter() if now is None else now
+        sent = all([self.send_message(message) for message in messages])
+        self.adapt_send_rate()
+        return sent
+    
+    def adapt_send_rate(self):
+        """Lower the send rate when RTT or the socket backlog grows, recover when it clears"""
+        backlog = self.get_send_backlog()
+        if (self.rtt is not None and self.rtt > HIGH_RTT) or backlog > BACKLOG_LIMIT:
+            self.send_rate = max(self.min_send_rate, self.send_rate * 0.75)
+        elif (self.rtt is None or self.rtt < LOW_RTT) and backlog == 0:
+            self.send_rate = min(self.max_send_rate, self.send_rate + 1)
+    
+    def get_send_backlog(self):
+        """Bytes written to the socket but not yet sent (0 where the OS can't tell us)"""
+        if fcntl is None or not self.socket:
+            return 0
+        try:
+            data = fcntl.ioctl(self.socket.fileno(), termios.TIOCOUTQ, b'\0\0\0\0')
+            return struct.unpack('i', data)[0]
+        except:
+            return 0
+    
+    def get_stats(self):
+        """Get RTT, traffic counters and rates, send queue depth and error counts"""
+        self.stats.update_rates()
+        stats = self.stats.get_stats()
+        stats.update({
+            'transport': 'udp' if self.udp else 'tcp',
+            'codec': 'binary' if self.encode is not encode_json else 'json',
+            'send_rate': round(self.send_rate, 1),
+            'send_backlog': self.get_send_backlog(),  # Bytes the OS hasn't sent yet
+            'pending_events': len(self.pending_events),
+            'unacked_inputs': len(self.unacked_inputs),
+            'malformed': self.decoder.malformed,
+            'snapshot_tick': self.snapshots.tick,
+            'mispredictions': self.prediction.mispredictions
+        })
+        if self.udp:
+            peer = self.udp.get_stats()
+            stats['malformed'] += peer['malformed']
+            stats['unacked'] = peer['unacked']
+            stats['resent'] = peer['resent']
+            stats['stale_dropped'] = peer['stale_dropped']
+            stats['dropped'] += peer['failed']
+        return stats
+    
+    def request_rooms(self):
+        """Ask the server for the lobby listing, the reply lands in self.rooms"""
+        return self.send_message({'type': 'list_rooms'})
     
     def get_remote_position(self):
         """Get the position of the remote player"""
         return self.remote_position
     
+    def get_interpolated_remote_position(self, now=None):
+        """Get where to draw the remote player, or None before any position arrived"""
+        return self.remote_buffer.sample(now)
+    
+    def get_world(self, now=None):
+        """Get the server's entities to draw now as {id: (kind, x, y)}"""
+        return self.world.sample(now)
+    
+    def get_world_meta(self):
+        """Get the latest snapshot's meta values (score, health, ...)"""
+        return self.snapshots.get_meta()
+    
+    def get_position_correction(self, dt):
+        """Get the (dx, dy) to move the local player by this tick after server acks"""
+        return self.prediction.take_correction(dt)
+    
     def get_remote_bullets(self):
         """Get any remote bullets that have been fired"""
         bullets = []
@@ -104,32 +346,116 @@ class GameClient:
             bullets.append(self.remote_bullets.get())
         return bullets
     
+    def _read_messages(self):
+        """Wait for the next read and return the messages it completed"""
+        if self.udp:
+            try:
+                data = self.socket.recv(4096)
+                if self.incoming:
+                    self.incoming(data, None)
+                else:
+                    self._receive_datagram(data)
+            except socket.timeout:
+                pass
+            with self.send_lock:
+                self.udp.resend()
+            
+            messages = []
+            while not self.udp_inbox.empty():
+                messages.append(self.udp_inbox.get())
+            return messages
+        
+        data = self.socket.recv(4096)
+        if not data:
+            raise ConnectionError("Server closed the connection")
+        # A read can hold several messages or part of one
+        messages = self.decoder.feed(data)
+        self.stats.record_in(len(data), len(messages))
+        return messages
+    
+    def _receive_datagram(self, data):
+        """Run a datagram through the UDP channels, queueing what it delivers"""
+        with self.send_lock:  # Acks update the channel state sends read
+            messages = self.udp.receive(data)
+        self.stats.record_in(len(data), len(messages))
+        for message in messages:
+            self.udp_inbox.put(message)
+    
+    def _receive_welcome(self):
+        """Block until the server's welcome (or error) message arrives"""
+        deadline = time.monotonic() + 5.0
+        while time.monotonic() < deadline:
+            reply = None
+            for message in self._read_messages():
+                if reply is None and message.get('type') in ('welcome', 'error'):
+                    reply = message
+                else:
+                    # Normal traffic (over UDP it can overtake a resent welcome)
+                    self._handle_message(message)
+            if reply is not None:
+                return reply
+        raise Exception("No reply from server")
+    
     def _receive_loop(self):
         """Internal method to continuously receive data from server"""
         while self.running and self.connected:
             try:
-                data = self.socket.recv(1024)
-                if data:
-                    self._handle_message(data)
-                else:
-                    # Empty data means disconnected
-                    self.connected = False
-                    break
+                for message in self._read_messages():
+                    self._handle_message(message)
+            except ConnectionError:
+                # Empty data means disconnected
+                self.connected = False
+                break
             except Exception as e:
-                print(f"Receive error: {e}")
+                if self.running:  # Otherwise we closed the socket ourselves
+                    print(f"Receive error: {e}")
                 self.connected = False
                 break
         
         print("Receive thread ended")
     
-    def _handle_message(self, data):
+    def _set_remote_position(self, x, y):
+        self.remote_position = (x, y)
+        self.remote_buffer.add(x, y)
+    
+    def _handle_message(self, message):
         """Process received message"""
         try:
-            message = json.loads(data.decode('utf-8'))
             msg_type = message.get('type')
             
-            if msg_type == 'position':
-                self.remote_position = (message.get('x'), message.get('y'))
+            if msg_type == 'state':
+                if 'x' in message:
+                    self._set_remote_position(message.get('x'), message.get('y'))
+                for event in message.get('events', []):
+                    self._handle_message(event)
+            
+            elif msg_type == 'state_ack':
+                # The server's result for one of our inputs
+                seq = message.get('seq', 0)
+                self.prediction.acknowledge(seq, message.get('x'), message.get('y'))
+                self.acked_input_seq = seq
+            
+            elif msg_type == 'pong':
+                # Smooth the round trip time so one slow reply doesn't swing the rate
+                self.rtt = self.stats.record_rtt(time.perf_counter() - message.get('t', 0))
+            
+            elif msg_type == 'ping':
+                # The server measuring its RTT to us
+                self.send_message({'type': 'pong', 't': message.get('t')})
+            
+            elif msg_type == 'snapshot':
+                # Ack what we decoded so the server deltas against it next
+                tick = self.snapshots.decode(message.get('data', b''))
+                if tick is not None:
+                    self.send_message({'type': 'snapshot_ack', 'tick': tick})
+                    if tick == self.snapshots.tick:
+                        self.world.add(self.snapshots.get_entities())
+            
+            elif msg_type == 'rooms':
+                self.rooms = message.get('rooms', {})
+            
+            elif msg_type == 'position':
+                self._set_remote_position(message.get('x'), message.get('y'))
             
             elif msg_type == 'bullet':
                 self.remote_bullets.put((message.get('x'), message.get('y')))
@@ -137,6 +463,6 @@ class GameClient:
             elif msg_type == 'game_over':
                 # Handle remote player game over
                 pass
-                
+        
         except Exception as e:
             print(f"Message handling error: {e}")
@@ -0,0 +1,260 @@
+import math
+import threading
+import time
+from collections import deque
+
+from network.udp import seq_newer
+
+# Remote entities are drawn this far in the past, so there is usually a
+# received sample on both sides of the moment being rendered
+INTERPOLATION_DELAY = 0.1  # seconds
+MAX_EXTRAPOLATION = 0.25  # Keep moving along the last velocity for at most this long
+CORRECTION_TIME = 0.1  # Time constant for easing out position errors (seconds)
+MAX_CORRECTION = 100  # Errors bigger than this (respawns, teleports) snap instead
+MAX_SAMPLES = 32
+MAX_PENDING_INPUTS = 128  # Unacked predictions kept for reconciliation
+
+class InterpolationBuffer:
+    """Timestamped positions of a remote entity, sampled a fixed delay behind
+
+    add() is called from the receive thread with each position as it arrives,
+    sample() from the game loop. Between samples the position is interpolated;
+    when packets stop arriving it is extrapolated briefly, and when they resume
+    the jump is eased out over CORRECTION_TIME instead of snapping.
+    """
+    def __init__(self, delay=INTERPOLATION_DELAY, max_extrapolation=MAX_EXTRAPOLATION,
+                 correction_time=CORRECTION_TIME):
+        self.delay = delay
+        self.max_extrapolation = max_extrapolation
+        self.correction_time = correction_time
+        self.samples = deque(maxlen=MAX_SAMPLES)  # (time, x, y), oldest first
+        self.lock = threading.Lock()
+        
+        # Error still being eased out, and when it was measured
+        self.offset = (0.0, 0.0)
+        self.offset_time = 0.0
+        
+        # Counters
+        self.extrapolated = 0  # sample() calls that ran past the newest sample
+        self.corrections = 0
+    
+    def add(self, x, y, now=None):
+        """Record a position received at now"""
+        if now is None:
+            now = time.perf_counter()
+        with self.lock:
+            if self.samples and now < self.samples[-1][0]:
+                now = self.samples[-1][0]
+            
+            # Only a render time past the newest sample (extrapolating) can move
+            render_time = now - self.delay
+            before = self._position(render_time) if self.samples else None
+            self.samples.append((now, x, y))
+            if before is None:
+                return
+            
+            after = self._position(render_time)
+            offset_x, offset_y = self._offset(now)
+            error_x = before[0] + offset_x - after[0]
+            error_y = before[1] + offset_y - after[1]
+            if math.hypot(error_x, error_y) > MAX_CORRECTION:
+                error_x = error_y = 0.0
+            elif error_x or error_y:
+                self.corrections += 1
+            self.offset = (error_x, error_y)
+            self.offset_time = now
+    
+    def sample(self, now=None):
+        """Get the (x, y) to draw at now, or None before the first sample"""
+        if now is None:
+            now = time.perf_counter()
+        with self.lock:
+            if not self.samples:
+                return None
+            render_time = now - self.delay
+            
+            # Keep one sample at or before the render time to interpolate from
+            while len(self.samples) > 2 and self.samples[1][0] <= render_time:
+                self.samples.popleft()
+            
+            x, y = self._position(render_time)
+            offset_x, offset_y = self._offset(now)
+            return (x + offset_x, y + offset_y)
+    
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+            self.offset = (0.0, 0.0)
+    
+    def _offset(self, now):
+        """The correction offset left at now"""
+        if not self.offset[0] and not self.offset[1]:
+            return self.offset
+        decay = math.exp(-(now - self.offset_time) / self.correction_time)
+        return (self.offset[0] * decay, self.offset[1] * decay)
+    
+    def _position(self, render_time):
+        """Interpolate (or extrapolate) the samples at render_time"""
+        samples = self.samples
+        first_time, first_x, first_y = samples[0]
+        if render_time <= first_time:
+            return (first_x, first_y)
+        
+        last_time, last_x, last_y = samples[-1]
+        if render_time > last_time:
+            if len(samples) < 2:
+                return (last_x, last_y)
+            self.extrapolated += 1
+            prev_time, prev_x, prev_y = samples[-2]
+            span = last_time - prev_time
+            if span <= 0:
+                return (last_x, last_y)
+            ahead = min(render_time - last_time, self.max_extrapolation) / span
+            return (last_x + (last_x - prev_x) * ahead, last_y + (last_y - prev_y) * ahead)
+        
+        # Newest pair that brackets the render time
+        for i in range(len(samples) - 1, 0, -1):
+            start_time, start_x, start_y = samples[i - 1]
+            if start_time <= render_time:
+                end_time, end_x, end_y = samples[i]
+                span = end_time - start_time
+                t = (render_time - start_time) / span if span > 0 else 1.0
+                return (start_x + (end_x - start_x) * t, start_y + (end_y - start_y) * t)
+        return (first_x, first_y)
+
+class SnapshotBuffer:
+    """Timestamped world snapshots, sampled a fixed delay behind like InterpolationBuffer
+
+    Entities are interpolated between the two snapshots around the render time.
+    Ones that jump further than MAX_CORRECTION (enemies wrapping back to the
+    top) snap, and ones that only exist in the newer snapshot appear once the
+    render time reaches it.
+    """
+    def __init__(self, delay=INTERPOLATION_DELAY):
+        self.delay = delay
+        self.snapshots = deque(maxlen=MAX_SAMPLES)  # (time, {id: (kind, x, y)}), oldest first
+        self.lock = threading.Lock()
+    
+    def add(self, entities, now=None):
+        """Record a decoded snapshot received at now"""
+        if now is None:
+            now = time.perf_counter()
+        with self.lock:
+            if self.snapshots and now < self.snapshots[-1][0]:
+                now = self.snapshots[-1][0]
+            self.snapshots.append((now, entities))
+    
+    def sample(self, now=None):
+        """Get {id: (kind, x, y)} to draw at now (empty before the first snapshot)"""
+        if now is None:
+            now = time.perf_counter()
+        with self.lock:
+            if not self.snapshots:
+                return {}
+            render_time = now - self.delay
+            while len(self.snapshots) > 2 and self.snapshots[1][0] <= render_time:
+                self.snapshots.popleft()
+            
+            start_time, start = self.snapshots[0]
+            if len(self.snapshots) < 2 or render_time <= start_time:
+                return dict(start)
+            end_time, end = self.snapshots[1]
+            if render_time >= end_time:
+                return dict(end)
+        
+        t = (render_time - start_time) / (end_time - start_time)
+        world = {}
+        for entity_id, (kind, x, y) in start.items():
+            target = end.get(entity_id)
+            if target is None:
+                world[entity_id] = (kind, x, y)  # Gone by the next snapshot
+                continue
+            end_kind, end_x, end_y = target
+            if end_kind != kind or math.hypot(end_x - x, end_y - y) > MAX_CORRECTION:
+                world[entity_id] = target
+            else:
+                world[entity_id] = (kind, x + (end_x - x) * t, y + (end_y - y) * t)
+        return world
+    
+    def clear(self):
+        with self.lock:
+            self.snapshots.clear()
+
+class PredictionBuffer:
+    """Local player positions predicted per input, reconciled against server acks
+
+    The game moves the local player immediately and records the position it
+    predicted for each input sequence number. When the server acknowledges a
+    sequence with the position it computed, the difference is the prediction
+    error: every later prediction was off by the same amount, so they are
+    shifted and the error is handed back to the game a little each tick.
+    """
+    def __init__(self, correction_time=CORRECTION_TIME, max_pending=MAX_PENDING_INPUTS):
+        self.correction_time = correction_time
+        self.pending = deque(maxlen=max_pending)  # (seq, x, y), oldest first
+        self.lock = threading.Lock()
+        self.correction = [0.0, 0.0]  # Error not yet applied to the player
+        self.acked_seq = None
+        
+        # Counters
+        self.acks = 0
+        self.mispredictions = 0
+    
+    def record(self, seq, x, y):
+        """Remember where input seq left the local player"""
+        with self.lock:
+            # Count the error still being eased in, it's already known to be wrong
+            self.pending.append((seq, x + self.correction[0], y + self.correction[1]))
+    
+    def acknowledge(self, seq, x, y):
+        """Compare the server's position for input seq with our prediction"""
+        with self.lock:
+            if self.acked_seq is not None and not seq_newer(seq, self.acked_seq):
+                return  # Arrived out of order
+            self.acked_seq = seq
+            self.acks += 1
+            
+            # Drop predictions the server has now confirmed
+            predicted = None
+            while self.pending and not seq_newer(self.pending[0][0], seq):
+                entry = self.pending.popleft()
+                if entry[0] == seq:
+                    predicted = entry
+            if predicted is None:
+                return
+            
+            error_x = x - predicted[1]
+            error_y = y - predicted[2]
+            if not error_x and not error_y:
+                return
+            self.mispredictions += 1
+            self.pending = deque(((s, px + error_x, py + error_y) for s, px, py in self.pending),
+                                 maxlen=self.pending.maxlen)
+            self.correction[0] += error_x
+            self.correction[1] += error_y
+    
+    def take_correction(self, dt):
+        """Whole pixels (dx, dy) of the outstanding error to apply this tick"""
+        with self.lock:
+            error_x, error_y = self.correction
+            if math.hypot(error_x, error_y) > MAX_CORRECTION or self.correction_time <= 0:
+                fraction = 1.0  # Too far off to ease, apply it all at once
+            else:
+                fraction = min(1.0, dt / self.correction_time)
+            
+            step = []
+            for axis, error in enumerate((error_x, error_y)):
+                move = error * fraction
+                if abs(move) < 1:
+                    move = max(-1.0, min(1.0, error))  # At least a pixel a tick so it settles
+                move = int(round(move))
+                remaining = error - move
+                self.correction[axis] = remaining if abs(remaining) >= 0.5 else 0.0
+                step.append(move)
+            return tuple(step)
+    
+    def clear(self):
+        with self.lock:
+            self.pending.clear()
+            self.correction = [0.0, 0.0]
+            self.acked_seq = None
@@ -0,0 +1,245 @@
+import base64
+import json
+import struct
+
+PROTOCOL_VERSION = 2
+
+# Every frame is a message type byte and a payload length, then the payload
+HEADER = struct.Struct('!BH')
+MAX_PAYLOAD = 0xFFFF
+
+# Message type ids
+MSG_JSON = 0  # Payload is a UTF-8 JSON object (fallback for anything else)
+MSG_POSITION = 1
+MSG_BULLET = 2
+MSG_GAME_OVER = 3
+MSG_DISCONNECT = 4
+MSG_PING = 5
+MSG_PONG = 6
+MSG_STATE = 7  # Latest position plus every event since the previous packet
+MSG_SNAPSHOT = 8  # Payload is a delta-compressed world snapshot (network.snapshot)
+MSG_SNAPSHOT_ACK = 9
+MSG_INPUT = 10  # Buttons held on each recent client tick, newest last
+MSG_STATE_ACK = 11
+
+# type name -> (id, body struct, field names) for the compact binary encoding
+BINARY_MESSAGES = {
+    'position': (MSG_POSITION, struct.Struct('!hh'), ('x', 'y')),
+    'bullet': (MSG_BULLET, struct.Struct('!hh'), ('x', 'y')),
+    'game_over': (MSG_GAME_OVER, None, ()),
+    'disconnect': (MSG_DISCONNECT, None, ()),
+    'ping': (MSG_PING, struct.Struct('!d'), ('t',)),
+    'pong': (MSG_PONG, struct.Struct('!d'), ('t',)),
+    'snapshot_ack': (MSG_SNAPSHOT_ACK, struct.Struct('!I'), ('tick',)),
+    'state_ack': (MSG_STATE_ACK, struct.Struct('!Hhh'), ('seq', 'x', 'y')),
+}
+BINARY_IDS = {spec[0]: (name,) + spec[1:] for name, spec in BINARY_MESSAGES.items()}
+
+# State packets: flags, input sequence, x, y, event count, then (type id, x, y) per event
+STATE_HEADER = struct.Struct('!BHhhB')
+STATE_EVENT = struct.Struct('!Bhh')
+STATE_HAS_POSITION = 0x01
+STATE_HAS_SEQ = 0x02
+STATE_EVENT_TYPES = {'bullet': MSG_BULLET, 'game_over': MSG_GAME_OVER}
+STATE_EVENT_NAMES = {msg_id: name for name, msg_id in STATE_EVENT_TYPES.items()}
+MAX_STATE_EVENTS = 255
+
+# Input packets: sequence of the newest input, then one button byte per tick
+# (game.input button bits)
+INPUT_HEADER = struct.Struct('!H')
+
+class ProtocolError(Exception):
+    """Raised for frames that can't be encoded or decoded"""
+    pass
+
+def encode_state(message):
+    """Pack a state message, or return None if it doesn't fit the binary layout"""
+    events = message.get('events', [])
+    if len(events) > MAX_STATE_EVENTS or set(message) - {'type', 'seq', 'x', 'y', 'events'}:
+        return None
+    
+    has_position = 'x' in message
+    flags = (STATE_HAS_POSITION if has_position else 0) | (STATE_HAS_SEQ if 'seq' in message else 0)
+    parts = [STATE_HEADER.pack(flags, message.get('seq', 0),
+                               message['x'] if has_position else 0,
+                               message['y'] if has_position else 0,
+                               len(events))]
+    for event in events:
+        msg_id = STATE_EVENT_TYPES.get(event.get('type'))
+        if msg_id is None:
+            return None
+        parts.append(STATE_EVENT.pack(msg_id, event.get('x', 0), event.get('y', 0)))
+    return b''.join(parts)
+
+def decode_state(payload):
+    """Unpack a binary state payload"""
+    if len(payload) < STATE_HEADER.size:
+        raise ProtocolError("Truncated state payload")
+    flags, seq, x, y, count = STATE_HEADER.unpack_from(payload)
+    if len(payload) != STATE_HEADER.size + count * STATE_EVENT.size:
+        raise ProtocolError(f"Bad state payload size {len(payload)}")
+    
+    message = {'type': 'state'}
+    if flags & STATE_HAS_SEQ:
+        message['seq'] = seq
+    if flags & STATE_HAS_POSITION:
+        message['x'] = x
+        message['y'] = y
+    
+    events = []
+    for offset in range(STATE_HEADER.size, len(payload), STATE_EVENT.size):
+        msg_id, event_x, event_y = STATE_EVENT.unpack_from(payload, offset)
+        name = STATE_EVENT_NAMES.get(msg_id)
+        if name is None:
+            raise ProtocolError(f"Unknown state event type {msg_id}")
+        if name == 'game_over':
+            events.append({'type': name})
+        else:
+            events.append({'type': name, 'x': event_x, 'y': event_y})
+    message['events'] = events
+    return message
+
+def encode_input(message):
+    """Pack an input message, or return None if it doesn't fit the binary layout"""
+    if set(message) - {'type', 'seq', 'inputs'}:
+        return None
+    return INPUT_HEADER.pack(message.get('seq', 0)) + bytes(message.get('inputs', []))
+
+def decode_input(payload):
+    """Unpack a binary input payload"""
+    if len(payload) < INPUT_HEADER.size:
+        raise ProtocolError("Truncated input payload")
+    seq, = INPUT_HEADER.unpack_from(payload)
+    return {'type': 'input', 'seq': seq, 'inputs': list(payload[INPUT_HEADER.size:])}
+
+def encode_json(message):
+    """Encode a message dict as a JSON frame"""
+    if message.get('type') == 'snapshot':
+        # Snapshot data is binary, carry it as base64 text
+        message = dict(message, data=base64.b64encode(message['data']).decode('ascii'))
+    payload = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    if len(payload) > MAX_PAYLOAD:
+        raise ProtocolError(f"Message too large ({len(payload)} bytes)")
+    return HEADER.pack(MSG_JSON, len(payload)) + payload
+
+def encode_binary(message):
+    """Encode a message dict as a struct-packed frame, falling back to JSON"""
+    if message.get('type') == 'snapshot':
+        payload = message['data']
+        if len(payload) > MAX_PAYLOAD:
+            raise ProtocolError(f"Snapshot too large ({len(payload)} bytes)")
+        return HEADER.pack(MSG_SNAPSHOT, len(payload)) + payload
+    
+    if message.get('type') == 'state':
+        try:
+            payload = encode_state(message)
+        except struct.error:
+            payload = None
+        if payload is None:
+            return encode_json(message)
+        return HEADER.pack(MSG_STATE, len(payload)) + payload
+    
+    if message.get('type') == 'input':
+        try:
+            payload = encode_input(message)
+        except (struct.error, ValueError, TypeError):
+            payload = None
+        if payload is None:
+            return encode_json(message)
+        return HEADER.pack(MSG_INPUT, len(payload)) + payload
+    
+    spec = BINARY_MESSAGES.get(message.get('type'))
+    if spec is None or len(message) != len(spec[2]) + 1:
+        return encode_json(message)
+    
+    msg_id, body, fields = spec
+    if body is None:
+        return HEADER.pack(msg_id, 0)
+    try:
+        payload = body.pack(*[message[field] for field in fields])
+    except (struct.error, KeyError):
+        # Values that don't fit the compact layout still go through
+        return encode_json(message)
+    return HEADER.pack(msg_id, len(payload)) + payload
+
+def decode_frame(msg_id, payload):
+    """Decode one frame payload into a message dict"""
+    if msg_id == MSG_JSON:
+        try:
+            message = json.loads(payload.decode('utf-8'))
+        except ValueError as e:
+            raise ProtocolError(f"Bad JSON payload: {e}")
+        if not isinstance(message, dict):
+            raise ProtocolError("JSON payload is not an object")
+        if message.get('type') == 'snapshot':
+            try:
+                message['data'] = base64.b64decode(message.get('data', ''))
+            except ValueError as e:
+                raise ProtocolError(f"Bad snapshot data: {e}")
+        return message
+    
+    if msg_id == MSG_STATE:
+        return decode_state(payload)
+    if msg_id == MSG_INPUT:
+        return decode_input(payload)
+    if msg_id == MSG_SNAPSHOT:
+        return {'type': 'snapshot', 'data': payload}
+    
+    spec = BINARY_IDS.get(msg_id)
+    if spec is None:
+        raise ProtocolError(f"Unknown message type {msg_id}")
+    
+    name, body, fields = spec
+    message = {'type': name}
+    if body is not None:
+        if len(payload) != body.size:
+            raise ProtocolError(f"Bad {name} payload size {len(payload)}")
+        message.update(zip(fields, body.unpack(payload)))
+    return message
+
+# Codecs that can be negotiated in the hello/welcome handshake, preferred first
+CODECS = {
+    'binary': encode_binary,
+    'json': encode_json,
+}
+
+def choose_codec(offered):
+    """Pick the first codec we support from a client's offer"""
+    for name in offered or ():
+        if name in CODECS:
+            return name
+    return 'json'
+
+class StreamDecoder:
+    """Incremental frame decoder that copes with partial and coalesced reads"""
+    def __init__(self):
+        self.buffer = bytearray()
+        self.malformed = 0
+    
+    def feed(self, data):
+        """Add received bytes and return every complete message"""
+        buffer = self.buffer
+        buffer += data
+        messages = []
+        offset = 0
+        
+        while len(buffer) - offset >= HEADER.size:
+            msg_id, length = HEADER.unpack_from(buffer, offset)
+            end = offset + HEADER.size + length
+            if end > len(buffer):
+                break  # Wait for the rest of the frame
+            try:
+                messages.append(decode_frame(msg_id, bytes(buffer[offset + HEADER.size:end])))
+            except ProtocolError as e:
+                # Framing is intact, so skip just this message
+                self.malformed += 1
+                print(f"Malformed message: {e}")
+            offset = end
+        
+        if offset:
+            del buffer[:offset]
+        return messages
+    
+    def pending(self):
+        """Number of buffered bytes not yet forming a complete frame"""
+        return len(self.buffer)
@@ -1,152 +1,643 @@
-import socket
+import argparse
+import asyncio
 import json
+import os
 import threading
 import time
 
+from network.protocol import PROTOCOL_VERSION, CODECS, StreamDecoder, choose_codec, encode_json
+from network.udp import UdpPeer
+from network.snapshot import SnapshotEncoder, make_snapshot
+from network.stats import TrafficStats
+from game.simulation import MatchSimulation
+
+# Outgoing bytes a connection may have queued before we drop messages to it
+MAX_WRITE_BUFFER = 64 * 1024
+
+# Room housekeeping
+DEFAULT_ROOM = 'default'
+ROOM_SIZE = 2  # Players per match
+ROOM_GC_INTERVAL = 5.0  # seconds between sweeps (also the message rate window)
+ROOM_IDLE_TIMEOUT = 30.0  # Empty rooms are removed after this long
+ROOM_STALE_TIMEOUT = 300.0  # Rooms where nobody sent anything are closed after this long
+
+# Server-run matches
+TICK_RATE = 60  # Simulation ticks per second, same as the client
+SNAPSHOT_INTERVAL = 2  # Ticks between snapshots (30 per second)
+MAX_TICK_LAG = 0.25  # seconds behind schedule before skipping ticks instead of catching up
+
+# Instrumentation
+STATS_INTERVAL = 1.0  # seconds between rate updates and RTT probes to each client
+STATS_DUMP_INTERVAL = 10.0  # seconds between writes of the stats JSON file
+
+# UDP clients
+UDP_SERVICE_INTERVAL = 0.05  # seconds between resend passes
+UDP_PEER_TIMEOUT = 10.0  # Forget UDP clients we haven't heard from for this long
+
+class Connection:
+    """One connected client: its stream, negotiated codec and write buffer"""
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.player_id = None
+        self.room = None
+        self.address = writer.get_extra_info('peername')
+        self.encode = encode_json
+        self.decoder = StreamDecoder()
+        self.stats = TrafficStats()
+    
+    def send(self, message):
+        """Queue a message without blocking, dropping it if the peer is too far behind"""
+        if self.writer.is_closing():
+            return False
+        
+        # A slow peer only ever fills its own buffer, it never stalls the sender
+        if self.writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            self.stats.dropped += 1
+            return False
+        
+        data = self.encode(message)
+        self.writer.write(data)
+        self.stats.record_out(len(data), 1)
+        return True
+    
+    def get_stats(self):
+        """Get this client's traffic counters, write queue and decode errors"""
+        stats = self.stats.get_stats()
+        stats.update({
+            'transport': 'tcp',
+            'address': '%s:%s' % self.address[:2] if self.address else None,
+            'room': self.room.name if self.room else None,
+            'player': self.player_id,
+            'queue_bytes': (0 if self.writer.is_closing()
+                            else self.writer.transport.get_write_buffer_size()),
+            'partial_bytes': self.decoder.pending(),
+            'malformed': self.decoder.malformed
+        })
+        return stats
+    
+    def close(self):
+        """Close the stream"""
+        try:
+            self.writer.close()
+        except:
+            pass
+
+class UdpConnection:
+    """One UDP client, sharing the server's datagram socket"""
+    def __init__(self, server, transport, address):
+        self.server = server
+        self.transport = transport
+        self.stats = TrafficStats()
+        self.peer = UdpPeer(self._sendto, address)
+        self.player_id = None
+        self.room = None
+        self.address = address
+        self.welcomed = False
+        self.closed = False
+    
+    @property
+    def encode(self):
+        return self.peer.encode
+    
+    @encode.setter
+    def encode(self, encode):
+        self.peer.encode = encode
+    
+    def send(self, message):
+        """Send on the unreliable or reliable channel, depending on the message"""
+        if self.closed:
+            return False
+        self.peer.send(message)
+        self.stats.record_out(0, 1)
+        return True
+    
+    def _sendto(self, datagram, address):
+        # Count every datagram, including acks and resends
+        self.stats.record_out(len(datagram))
+        self.transport.sendto(datagram, address)
+    
+    def get_stats(self):
+        """Get this client's traffic counters, unacked datagrams and channel counters"""
+        stats = self.stats.get_stats()
+        peer = self.peer.get_stats()
+        stats.update({
+            'transport': 'udp',
+            'address': '%s:%s' % self.address[:2],
+            'room': self.room.name if self.room else None,
+            'player': self.player_id,
+            'queue_bytes': sum(len(entry[0]) for entry in list(self.peer.unacked.values())),
+            'unacked': peer['unacked'],
+            'resent': peer['resent'],
+            'stale_dropped': peer['stale_dropped'],
+            'malformed': peer['malformed']
+        })
+        stats['dropped'] += peer['failed']
+        return stats
+    
+    def close(self):
+        """Forget this client"""
+        if not self.closed:
+            self.closed = True
+            self.server._drop_udp(self)
+
+class UdpServerProtocol(asyncio.DatagramProtocol):
+    """Hands datagrams on the server port to the GameServer"""
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+    
+    def connection_made(self, transport):
+        self.transport = transport
+    
+    def datagram_received(self, data, address):
+        self.server._handle_datagram(self.transport, data, address)
+    
+    def error_received(self, exc):
+        pass  # ICMP errors from clients that went away
+
+class Room:
+    """A named match: its player slots, simulation and traffic counters"""
+    def __init__(self, name, size=ROOM_SIZE, simulate=False):
+        self.name = name
+        self.players = [None] * size
+        self.simulate = simulate
+        self.match = MatchSimulation(size) if simulate else None
+        self.created = time.monotonic()
+        self.last_active = self.created
+        self.messages = 0
+        self.window_messages = 0
+        self.message_rate = 0.0  # messages per second over the last sweep window
+        
+        # CPU time spent ticking the match (simulation plus snapshot encoding)
+        self.ticks = 0
+        self.tick_time = 0.0
+        self.window_ticks = 0
+        self.window_tick_time = 0.0
+        self.max_tick_time = 0.0
+        self.tick_cost = 0.0  # Mean seconds per tick over the last sweep window
+    
+    def join(self, connection):
+        """Put a connection in the first free slot, returns the slot or -1 if full"""
+        if self.simulate and self.player_count() == 0:
+            # A fresh match, not whatever the last players left behind
+            self.match = MatchSimulation(len(self.players))
+        for i in range(len(self.players)):
+            if self.players[i] is None:
+                self.players[i] = connection
+                connection.player_id = i
+                connection.room = self
+                if self.match:
+                    self.match.add_player(i)
+                self.last_active = time.monotonic()
+                return i
+        return -1
+    
+    def leave(self, connection):
+        """Free a connection's slot"""
+        if connection.player_id is not None and self.players[connection.player_id] is connection:
+            self.players[connection.player_id] = None
+            if self.match:
+                self.match.remove_player(connection.player_id)
+        self.last_active = time.monotonic()
+    
+    def others(self, connection):
+        """Get the other players in the room"""
+        return [player for player in self.players if player and player is not connection]
+    
+    def player_count(self):
+        return sum(1 for player in self.players if player)
+    
+    def record_message(self):
+        self.messages += 1
+        self.window_messages += 1
+        self.last_active = time.monotonic()
+    
+    def record_tick(self, elapsed):
+        self.ticks += 1
+        self.tick_time += elapsed
+        self.window_ticks += 1
+        self.window_tick_time += elapsed
+        if elapsed > self.max_tick_time:
+            self.max_tick_time = elapsed
+    
+    def get_tick_cost(self):
+        """Mean seconds per tick over the last sweep window, or so far before the first one"""
+        if self.tick_cost:
+            return self.tick_cost
+        return self.tick_time / self.ticks if self.ticks else 0.0
+
 class GameServer:
-    def __init__(self, host='0.0.0.0', port=5555):
+    def __init__(self, host='0.0.0.0', port=5555, udp=True, snapshot_metrics=None, simulate=True,
+                 stats_port=None, stats_path=None):
         self.host = host
         self.port = port
-        self.server_socket = None
-        self.clients = [None, None]  # Max 2 players
-        self.client_addresses = ['', '']
+        self.stats_port = stats_port  # Serve get_stats() as JSON over HTTP on localhost
+        self.stats_path = stats_path  # Also write it to this file every STATS_DUMP_INTERVAL
+        self.stats_server = None
+        self.simulate = simulate  # Run each room's match here (clients send only inputs)
+        self.snapshot_metrics = snapshot_metrics  # Called with per-packet snapshot sizes
+        self.udp = udp  # Also accept UDP clients on the same port number
+        self.udp_transport = None
+        self.udp_peers = {}  # address -> UdpConnection
+        self.server = None
+        self.loop = None
+        self.rooms = {}  # name -> Room
         self.running = False
     
     def start(self):
-        """Start the game server"""
+        """Start the game server (blocks until stopped)"""
         try:
-            self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.server_socket.bind((self.host, self.port))
-            self.server_socket.listen(2)  # Max 2 connections
-            
-            self.running = True
-            print(f"Server started on {self.host}:{self.port}")
-            
-            # Accept connections
-            while self.running:
-                client_socket, address = self.server_socket.accept()
-                self._handle_new_connection(client_socket, address)
-                
+            asyncio.run(self.serve())
         except Exception as e:
             print(f"Server error: {e}")
+        finally:
+            self.running = False
+            print("Server stopped")
+    
+    async def serve(self):
+        """Accept and serve clients on the running event loop"""
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(
+            self._handle_client, self.host, self.port, reuse_address=True, backlog=512)
+        
+        self.running = True
+        print(f"Server started on {self.host}:{self.port}")
+        
+        tasks = [self.loop.create_task(self._collect_rooms()),
+                 self.loop.create_task(self._sample_stats())]
+        if self.stats_port:
+            self.stats_server = await asyncio.start_server(
+                self._serve_stats, '127.0.0.1', self.stats_port, reuse_address=True)
+        if self.simulate:
+            tasks.append(self.loop.create_task(self._run_matches()))
+        if self.udp:
+            self.udp_transport, _ = await self.loop.create_datagram_endpoint(
+                lambda: UdpServerProtocol(self), local_addr=(self.host, self.port))
+            tasks.append(self.loop.create_task(self._service_udp()))
         
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        except asyncio.CancelledError:
+            pass
         finally:
-            self.stop()
+            for task in tasks:
+                task.cancel()
+            if self.stats_server:
+                self.stats_server.close()
+            self._close_all()
+            if self.udp_transport:
+                self.udp_transport.close()
     
     def stop(self):
-        """Stop the game server"""
+        """Stop the game server (safe to call from any thread)"""
         self.running = False
-        
-        # Close all client connections
-        for i, client in enumerate(self.clients):
-            if client:
-                try:
-                    client.close()
-                except:
-                    pass
-                self.clients[i] = None
-        
-        # Close server socket
-        if self.server_socket:
-            try:
-                self.server_socket.close()
-            except:
-                pass
-            self.server_socket = None
+        if self.loop and self.server:
+            self.loop.call_soon_threadsafe(self.server.close)
+    
+    def _close_all(self):
+        """Close all client connections"""
+        for room in self.rooms.values():
+            for player in room.players:
+                if player:
+                    player.close()
+        self.rooms.clear()
+    
+    async def _collect_rooms(self):
+        """Periodically update room message rates and drop idle rooms"""
+        last_sweep = time.monotonic()
+        while True:
+            await asyncio.sleep(ROOM_GC_INTERVAL)
+            now = time.monotonic()
+            elapsed = now - last_sweep
+            last_sweep = now
             
-        print("Server stopped")
-    
-    def _handle_new_connection(self, client_socket, address):
-        """Process a new client connection"""
-        # Find an empty slot
-        player_id = -1
-        for i in range(len(self.clients)):
-            if self.clients[i] is None:
-                player_id = i
-                self.clients[i] = client_socket
-                self.client_addresses[i] = address
+            for name, room in list(self.rooms.items()):
+                room.message_rate = room.window_messages / elapsed
+                room.window_messages = 0
+                if room.window_ticks:
+                    room.tick_cost = room.window_tick_time / room.window_ticks
+                room.window_ticks = 0
+                room.window_tick_time = 0.0
+                
+                idle = now - room.last_active
+                if room.player_count() == 0 and idle > ROOM_IDLE_TIMEOUT:
+                    del self.rooms[name]
+                elif idle > ROOM_STALE_TIMEOUT:
+                    # Nobody is playing, free the room and its connections
+                    print(f"Closing stale room {name}")
+                    for player in room.players:
+                        if player:
+                            player.close()
+                    del self.rooms[name]
+    
+    def connections(self):
+        """Every client seated in a room"""
+        return [player for room in list(self.rooms.values()) for player in room.players if player]
+    
+    async def _sample_stats(self):
+        """Update traffic rates, probe client RTTs and write the stats file"""
+        last_dump = time.monotonic()
+        while True:
+            await asyncio.sleep(STATS_INTERVAL)
+            now = time.monotonic()
+            for connection in self.connections():
+                connection.stats.update_rates(now, force=True)
+                connection.send({'type': 'ping', 't': time.perf_counter()})
+            
+            if self.stats_path and now - last_dump >= STATS_DUMP_INTERVAL:
+                last_dump = now
+                self.dump_stats(self.stats_path)
+    
+    def dump_stats(self, path):
+        """Write get_stats() to path as JSON, replacing the file atomically"""
+        try:
+            temp_path = path + '.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump(self.get_stats(), f, indent=2)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Stats dump error: {e}")
+    
+    async def _serve_stats(self, reader, writer):
+        """Answer any HTTP request on the stats port with get_stats() as JSON"""
+        try:
+            # Skip the request line and headers
+            while True:
+                line = await reader.readline()
+                if not line or line in (b'\r\n', b'\n'):
+                    break
+            body = json.dumps(self.get_stats(), indent=2).encode('utf-8')
+            writer.write(b'HTTP/1.0 200 OK\r\n'
+                         b'Content-Type: application/json\r\n'
+                         b'Content-Length: %d\r\n\r\n' % len(body) + body)
+            await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+    
+    async def _run_matches(self):
+        """Tick every occupied room's match at TICK_RATE"""
+        tick_dt = 1.0 / TICK_RATE
+        next_tick = self.loop.time()
+        while True:
+            next_tick += tick_dt
+            delay = next_tick - self.loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif delay < -MAX_TICK_LAG:
+                # Overloaded, let the matches run slow rather than spiral
+                next_tick = self.loop.time()
+            
+            for room in list(self.rooms.values()):
+                if room.match and room.player_count():
+                    self._tick_room(room)
+    
+    def _tick_room(self, room):
+        """Advance one room's match and send its players the results"""
+        start = time.perf_counter()
+        match = room.match
+        match.step()
+        
+        if match.tick % SNAPSHOT_INTERVAL == 0:
+            # Tell each client where its inputs left it, for reconciliation
+            for slot, (seq, x, y) in match.acks().items():
+                player = room.players[slot]
+                if player:
+                    player.send({'type': 'state_ack', 'seq': seq, 'x': x, 'y': y})
+            self.send_snapshot(room, match.tick, make_snapshot(match.entities(), match.meta()))
+        
+        room.record_tick(time.perf_counter() - start)
+    
+    async def _service_udp(self):
+        """Resend unacked reliable datagrams and forget silent UDP clients"""
+        while True:
+            await asyncio.sleep(UDP_SERVICE_INTERVAL)
+            now = time.monotonic()
+            for connection in list(self.udp_peers.values()):
+                if now - connection.peer.last_heard > UDP_PEER_TIMEOUT:
+                    connection.close()
+                else:
+                    connection.peer.resend(now)
+    
+    def _handle_datagram(self, transport, data, address):
+        """Run a datagram through its client's channels and handle what it delivers"""
+        connection = self.udp_peers.get(address)
+        if connection is None:
+            connection = self.udp_peers[address] = UdpConnection(self, transport, address)
+        
+        messages = connection.peer.receive(data)
+        connection.stats.record_in(len(data), len(messages))
+        for message in messages:
+            if not connection.welcomed:
+                if not self._welcome(connection, message):
+                    connection.close()
+                    break
+                connection.welcomed = True
+            elif self._process_message(message, connection):
+                connection.close()
                 break
+    
+    def _drop_udp(self, connection):
+        """Remove a UDP client and free its room slot"""
+        if self.udp_peers.get(connection.address) is connection:
+            del self.udp_peers[connection.address]
+        if connection.room:
+            print(f"Player {connection.player_id + 1} left room {connection.room.name}")
+            connection.room.leave(connection)
+    
+    def send_snapshot(self, room, tick, snapshot):
+        """Send a world snapshot to everyone in room, delta-encoded per client"""
+        for player in room.players:
+            if player:
+                player.send({'type': 'snapshot', 'data': player.snapshots.encode(tick, snapshot)})
+    
+    def get_stats(self, connections=True):
+        """Get room, match cost and traffic stats (with per-client detail if connections)"""
+        rooms = {}
+        load = 0.0
+        for name, room in list(self.rooms.items()):
+            rooms[name] = {
+                'players': room.player_count(),
+                'messages': room.messages,
+                'message_rate': round(room.message_rate, 1),
+                'age': round(time.monotonic() - room.created, 1)
+            }
+            if room.match:
+                rooms[name].update({
+                    'tick': room.match.tick,
+                    'tick_ms': round(room.get_tick_cost() * 1000, 3),
+                    'max_tick_ms': round(room.max_tick_time * 1000, 3)
+                })
+                if room.player_count():
+                    load += room.get_tick_cost() * TICK_RATE
         
-        if player_id == -1:
-            # No slots available
-            try:
-                client_socket.send(json.dumps({'error': 'Server full'}).encode('utf-8'))
-                client_socket.close()
-            except:
-                pass
-            return
+        stats = {
+            'room_count': len(rooms),
+            'player_count': sum(room['players'] for room in rooms.values()),
+            'rooms': rooms
+        }
+        if self.simulate:
+            # Fraction of one core the running matches use, and how many would fill it
+            running = sum(1 for room in self.rooms.values() if room.match and room.player_count())
+            stats['sim_load'] = round(load, 4)
+            stats['matches_per_core'] = int(running / load) if load else None
         
-        print(f"Player {player_id + 1} connected from {address}")
+        # Traffic totals across every client
+        clients = [connection.get_stats() for connection in self.connections()]
+        totals = {}
+        for name in ('messages_in', 'messages_out', 'bytes_in', 'bytes_out', 'dropped',
+                     'malformed', 'queue_bytes', 'messages_in_rate', 'messages_out_rate',
+                     'bytes_in_rate', 'bytes_out_rate'):
+            totals[name] = round(sum(client[name] for client in clients), 1)
+        rtts = sorted(client['rtt_ms'] for client in clients if client['rtt_ms'] is not None)
+        totals['rtt_ms_median'] = rtts[len(rtts) // 2] if rtts else None
+        totals['rtt_ms_max'] = rtts[-1] if rtts else None
+        stats['traffic'] = totals
+        if connections:
+            stats['connections'] = clients
+        return stats
+    
+    async def _handle_client(self, reader, writer):
+        """Handle communication with a connected client"""
+        connection = Connection(reader, writer)
         
-        # Send player ID to client
+        welcomed = False
         try:
-            client_socket.send(json.dumps({'player_id': player_id}).encode('utf-8'))
-        except:
-            self.clients[player_id] = None
-            return
-        
-        # Start a thread to handle this client
-        client_thread = threading.Thread(
-            target=self._handle_client, 
-            args=(client_socket, player_id)
-        )
-        client_thread.daemon = True
-        client_thread.start()
-    
-    def _handle_client(self, client_socket, player_id):
-        """Handle communication with a connected client"""
-        while self.running:
-            try:
+            while self.running:
                 # Receive data
-                data = client_socket.recv(1024)
+                data = await reader.read(4096)
                 if not data:
                     break  # Connection closed
                 
-                # Process message
-                self._process_message(data, player_id)
-                
-            except Exception as e:
-                print(f"Error handling client {player_id}: {e}")
-                break
+                # A read can hold several messages or part of one
+                messages = connection.decoder.feed(data)
+                connection.stats.record_in(len(data), len(messages))
+                done = False
+                for message in messages:
+                    if not welcomed:
+                        if not self._welcome(connection, message):
+                            done = True
+                            break
+                        welcomed = True
+                    elif self._process_message(message, connection):
+                        done = True
+                if done:
+                    break
+        
+        except asyncio.CancelledError:
+            pass  # Server shutting down
+        except Exception as e:
+            print(f"Error handling client {connection.address}: {e}")
         
         # Clean up when client disconnects
-        print(f"Player {player_id + 1} disconnected")
-        try:
-            client_socket.close()
-        except:
-            pass
-        self.clients[player_id] = None
+        if connection.room:
+            print(f"Player {connection.player_id + 1} left room {connection.room.name}")
+            connection.room.leave(connection)
+        connection.close()
+    
+    def _welcome(self, connection, hello):
+        """Seat a client in its room and answer with its player ID and codec
+
+        Returns False if the client was turned away.
+        """
+        codec = 'json'
+        room_name = DEFAULT_ROOM
+        version = None  # Clients from before the hello don't send one
+        if hello.get('type') == 'hello':
+            codec = choose_codec(hello.get('codecs'))
+            room_name = str(hello.get('room') or DEFAULT_ROOM)
+            version = hello.get('version')
+        
+        # Older clients would get a seat and then send what this server no longer reads
+        if version != PROTOCOL_VERSION:
+            connection.send({'type': 'error',
+                             'error': f"Protocol version {version} not supported, "
+                                      f"this server speaks version {PROTOCOL_VERSION}"})
+            return False
+        
+        # Create the room on first join
+        room = self.rooms.get(room_name)
+        if room is None:
+            room = self.rooms[room_name] = Room(room_name, simulate=self.simulate)
+        
+        if room.join(connection) == -1:
+            # No slots available
+            connection.send({'type': 'error', 'error': 'Room full'})
+            return False
+        
+        print(f"Player {connection.player_id + 1} joined room {room_name} from {connection.address}")
+        connection.snapshots = SnapshotEncoder(self.snapshot_metrics)
+        welcome = {
+            'type': 'welcome',
+            'player_id': connection.player_id,
+            'room': room_name,
+            'codec': codec,
+            'simulated': self.simulate
+        }
+        if room.match:
+            welcome['spawn'] = room.match.players[connection.player_id].rect.center
+        connection.send(welcome)
+        connection.encode = CODECS[codec]
+        return True
     
-    def _process_message(self, data, sender_id):
-        """Process a message from a client and forward to the other client"""
+    def _process_message(self, message, sender):
+        """Forward a message within the sender's room, returns True when the sender left"""
         try:
-            message = json.loads(data.decode('utf-8'))
             msg_type = message.get('type')
+            sender.room.record_message()
+            
+            # Answer RTT probes directly, they're not for the other player
+            if msg_type == 'ping':
+                sender.send({'type': 'pong', 't': message.get('t')})
+                return False
+            
+            # Answers to our own probes
+            if msg_type == 'pong':
+                if isinstance(message.get('t'), float):
+                    sender.stats.record_rtt(time.perf_counter() - message['t'])
+                return False
             
-            # Forward to the other player
-            other_id = 1 - sender_id  # Toggle between 0 and 1
-            if self.clients[other_id]:
-                try:
-                    self.clients[other_id].send(data)
-                except:
-                    pass
+            # Inputs drive the sender's player in the match, nobody else sees them
+            if msg_type == 'input':
+                if sender.room.match:
+                    sender.room.match.queue_inputs(sender.player_id, message.get('seq', 0),
+                                                   message.get('inputs', []))
+                return False
+            
+            # Snapshot acks move that client's delta baseline forward
+            if msg_type == 'snapshot_ack':
+                sender.snapshots.ack(message.get('tick', 0))
+                return False
+            
+            # Lobby listing
+            if msg_type == 'list_rooms':
+                sender.send({'type': 'rooms', 'rooms': {
+                    name: room.player_count() for name, room in self.rooms.items()
+                }})
+                return False
+            
+            # Forward to the other players in the room, in the codec they negotiated
+            for other in sender.room.others(sender):
+                other.send(message)
             
             # Handle disconnect specially
-            if msg_type == 'disconnect':
-                raise Exception("Client disconnected")
-                
+            return msg_type == 'disconnect'
+        
         except Exception as e:
             print(f"Message processing error: {e}")
+            return False
 
-def start_server():
-    """Start the game server"""
-    server = GameServer()
+def start_server(**options):
+    """Start the game server, options are passed to GameServer"""
+    server = GameServer(**options)
     server.start()
 
-def start_server_thread():
+def start_server_thread(**options):
     """Start the server in a separate thread"""
-    server_thread = threading.Thread(target=start_server)
+    server_thread = threading.Thread(target=start_server, kwargs=options)
     server_thread.daemon = True
     server_thread.start()
     
@@ -154,7 +645,21 @@ def start_server_thread():
     time.sleep(0.5)
     return server_thread
 
+def parse_args(argv=None):
+    """Server options from the command line, as GameServer keyword arguments"""
+    parser = argparse.ArgumentParser(description="Run the Sky Warr multiplayer server")
+    parser.add_argument('--host', default='0.0.0.0', help="address to listen on")
+    parser.add_argument('--port', type=int, default=5555, help="TCP and UDP port")
+    parser.add_argument('--stats-port', type=int, metavar='PORT',
+                        help="serve live stats as JSON on http://127.0.0.1:PORT/")
+    parser.add_argument('--stats-path', metavar='PATH',
+                        help=f"write the stats JSON here every {STATS_DUMP_INTERVAL:.0f} seconds")
+    args = parser.parse_args(argv)
+    return {'host': args.host, 'port': args.port, 'stats_port': args.stats_port,
+            'stats_path': args.stats_path}
+
 # If this script is run directly, start the server
 if __name__ == "__main__":
+    options = parse_args()
     print("Starting Sky Warr multiplayer server...")
-    start_server()
+    start_server(**options)
@@ -0,0 +1,244 @@
+import struct
+import zlib
+
+# Coordinates are sent in quarter pixels, which fits int16 for anything
+# within +-8191 px of the origin
+POSITION_SCALE = 4
+
+# Packet: flags, tick, baseline tick (0 = none, full snapshot)
+PACKET_HEADER = struct.Struct('!BII')
+FLAG_COMPRESSED = 0x01
+COMPRESS_THRESHOLD = 256  # Bodies smaller than this aren't worth compressing
+
+# Body: full count, delta count, removed count, meta count, then each section
+# stored column by column (all ids, then all xs, ...) so zlib finds the runs
+BODY_HEADER = struct.Struct('!HHHB')
+META_VALUE = struct.Struct('!i')
+FULL_RECORD_SIZE = 9  # id, kind, x, y
+MAX_HISTORY = 64  # Unacked snapshots kept per client as possible baselines
+
+def quantize(value):
+    """Convert a coordinate to the wire's fixed-point representation"""
+    return max(-32768, min(32767, int(round(value * POSITION_SCALE))))
+
+def dequantize(value):
+    return value / POSITION_SCALE
+
+def make_snapshot(entities, meta=None):
+    """Build a snapshot from {id: (kind, x, y)} and {name: int} meta values"""
+    return {
+        'entities': {entity_id: (kind, quantize(x), quantize(y))
+                     for entity_id, (kind, x, y) in entities.items()},
+        'meta': dict(meta or {})
+    }
+
+def encode_delta(tick, snapshot, baseline_tick=0, baseline=None):
+    """Encode snapshot as a delta against baseline (a full snapshot if baseline is None)
+
+    Returns (packet bytes, uncompressed body size).
+    """
+    entities = snapshot['entities']
+    base_entities = baseline['entities'] if baseline else {}
+    base_meta = baseline['meta'] if baseline else {}
+    
+    full = []
+    deltas = []
+    for entity_id in sorted(entities):
+        state = entities[entity_id]
+        old = base_entities.get(entity_id)
+        if old == state:
+            continue
+        kind, x, y = state
+        if old is not None and old[0] == kind:
+            dx, dy = x - old[1], y - old[2]
+            if -128 <= dx <= 127 and -128 <= dy <= 127:
+                deltas.append((entity_id, dx, dy))
+                continue
+        full.append((entity_id, kind, x, y))
+    
+    removed = [entity_id for entity_id in base_entities if entity_id not in entities]
+    
+    meta = []
+    for name, value in snapshot['meta'].items():
+        if base_meta.get(name) != value:
+            key = name.encode('utf-8')
+            meta.append(bytes([len(key)]) + key + META_VALUE.pack(value))
+    
+    # Ids are sorted, so send the gaps between them (mostly 1)
+    delta_ids = [entity_id for entity_id, _, _ in deltas]
+    delta_gaps = [b - a for a, b in zip([0] + delta_ids, delta_ids)]
+    parts = [
+        BODY_HEADER.pack(len(full), len(deltas), len(removed), len(meta)),
+        struct.pack(f'!{len(full)}I', *[record[0] for record in full]),
+        struct.pack(f'!{len(full)}B', *[record[1] for record in full]),
+        struct.pack(f'!{len(full)}h', *[record[2] for record in full]),
+        struct.pack(f'!{len(full)}h', *[record[3] for record in full]),
+        struct.pack(f'!{len(deltas)}I', *delta_gaps),
+        struct.pack(f'!{len(deltas)}b', *[record[1] for record in deltas]),
+        struct.pack(f'!{len(deltas)}b', *[record[2] for record in deltas]),
+        struct.pack(f'!{len(removed)}I', *removed),
+    ]
+    body = b''.join(parts + meta)
+    raw_size = len(body)
+    
+    flags = 0
+    if raw_size > COMPRESS_THRESHOLD:
+        compressed = zlib.compress(body, 1)
+        if len(compressed) < raw_size:
+            body = compressed
+            flags |= FLAG_COMPRESSED
+    
+    return PACKET_HEADER.pack(flags, tick, baseline_tick if baseline else 0) + body, raw_size
+
+def decode_delta(packet, baselines):
+    """Decode a packet into (tick, baseline tick, full snapshot)
+
+    baselines maps tick -> previously decoded snapshot. Raises KeyError if the
+    packet's baseline isn't among them.
+    """
+    flags, tick, baseline_tick = PACKET_HEADER.unpack_from(packet)
+    body = packet[PACKET_HEADER.size:]
+    if flags & FLAG_COMPRESSED:
+        body = zlib.decompress(body)
+    
+    if baseline_tick:
+        baseline = baselines[baseline_tick]
+        entities = dict(baseline['entities'])
+        meta = dict(baseline['meta'])
+    else:
+        entities = {}
+        meta = {}
+    
+    full_count, delta_count, removed_count, meta_count = BODY_HEADER.unpack_from(body)
+    offset = BODY_HEADER.size
+    
+    def column(code, count):
+        nonlocal offset
+        values = struct.unpack_from(f'!{count}{code}', body, offset)
+        offset += struct.calcsize(f'!{count}{code}')
+        return values
+    
+    ids = column('I', full_count)
+    kinds = column('B', full_count)
+    xs = column('h', full_count)
+    ys = column('h', full_count)
+    for entity_id, kind, x, y in zip(ids, kinds, xs, ys):
+        entities[entity_id] = (kind, x, y)
+    
+    gaps = column('I', delta_count)
+    dxs = column('b', delta_count)
+    dys = column('b', delta_count)
+    entity_id = 0
+    for gap, dx, dy in zip(gaps, dxs, dys):
+        entity_id += gap
+        kind, x, y = entities[entity_id]
+        entities[entity_id] = (kind, x + dx, y + dy)
+    
+    for entity_id in column('I', removed_count):
+        entities.pop(entity_id, None)
+    
+    for _ in range(meta_count):
+        length = body[offset]
+        name = body[offset + 1:offset + 1 + length].decode('utf-8')
+        offset += 1 + length
+        meta[name] = META_VALUE.unpack_from(body, offset)[0]
+        offset += META_VALUE.size
+    
+    return tick, baseline_tick, {'entities': entities, 'meta': meta}
+
+class SnapshotEncoder:
+    """Server side of one client's snapshot stream
+
+    Each packet is a delta against the newest snapshot the client acked.
+    metrics, if given, is called with a dict per packet (tick, bytes, raw
+    bytes, full bytes) so callers can track bytes per tick and compression.
+    """
+    def __init__(self, metrics=None):
+        self.history = {}  # tick -> snapshot sent but not yet superseded by an ack
+        self.acked_tick = 0
+        self.metrics = metrics
+        
+        # Totals for the compression ratio
+        self.packets = 0
+        self.bytes_sent = 0
+        self.full_bytes = 0
+    
+    def ack(self, tick):
+        """Record that the client has snapshot tick, older ones can be forgotten"""
+        if tick > self.acked_tick and tick in self.history:
+            self.acked_tick = tick
+            for old in [t for t in self.history if t < tick]:
+                del self.history[old]
+    
+    def encode(self, tick, snapshot):
+        """Encode the snapshot for this client"""
+        baseline = self.history.get(self.acked_tick)
+        packet, raw_size = encode_delta(tick, snapshot, self.acked_tick, baseline)
+        
+        self.history[tick] = snapshot
+        if len(self.history) > MAX_HISTORY:
+            # The client stopped acking, drop the oldest unacked snapshots
+            for old in sorted(self.history)[:-MAX_HISTORY]:
+                if old != self.acked_tick:
+                    del self.history[old]
+        
+        # What a full, uncompressed snapshot would have cost, for the ratio
+        full_size = (PACKET_HEADER.size + BODY_HEADER.size
+                     + FULL_RECORD_SIZE * len(snapshot['entities'])
+                     + sum(len(name) + 1 + META_VALUE.size for name in snapshot['meta']))
+        self.packets += 1
+        self.bytes_sent += len(packet)
+        self.full_bytes += full_size
+        if self.metrics:
+            self.metrics({
+                'tick': tick,
+                'bytes': len(packet),
+                'raw_bytes': PACKET_HEADER.size + raw_size,
+                'full_bytes': full_size
+            })
+        return packet
+    
+    def compression_ratio(self):
+        """Full snapshot bytes per byte actually sent"""
+        return self.full_bytes / self.bytes_sent if self.bytes_sent else 1.0
+
+class SnapshotDecoder:
+    """Client side of the snapshot stream: rebuilds full snapshots from deltas"""
+    def __init__(self):
+        self.snapshots = {}  # tick -> decoded snapshot, kept as possible baselines
+        self.tick = 0
+        self.latest = None
+        self.missing_baseline = 0
+    
+    def decode(self, packet):
+        """Apply a packet, returns the tick to ack or None if it couldn't be used"""
+        try:
+            tick, baseline_tick, snapshot = decode_delta(packet, self.snapshots)
+        except KeyError:
+            # Baseline already dropped, wait for the server to send a newer one
+            self.missing_baseline += 1
+            return None
+        
+        self.snapshots[tick] = snapshot
+        if tick > self.tick:
+            self.tick = tick
+            self.latest = snapshot
+        
+        # Baselines older than the one the server just used won't come back
+        for old in [t for t in self.snapshots if t < baseline_tick]:
+            del self.snapshots[old]
+        if len(self.snapshots) > MAX_HISTORY:
+            for old in sorted(self.snapshots)[:-MAX_HISTORY]:
+                if old != baseline_tick:
+                    del self.snapshots[old]
+        return tick
+    
+    def get_entities(self):
+        """Latest entities as {id: (kind, x, y)} in pixels"""
+        if not self.latest:
+            return {}
+        return {entity_id: (kind, dequantize(x), dequantize(y))
+                for entity_id, (kind, x, y) in self.latest['entities'].items()}
+    
+    def get_meta(self):
+        return dict(self.latest['meta']) if self.latest else {}
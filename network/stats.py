@@ -0,0 +1,73 @@
+import time
+
+RTT_SMOOTHING = 0.2  # Weight of each new RTT sample in the moving average
+RATE_WINDOW = 1.0  # Minimum seconds between rate updates
+
+class TrafficStats:
+    """Message and byte counters for one connection, in each direction
+
+    Totals only ever grow; update_rates() turns them into per-second rates
+    over the time since its previous call.
+    """
+    def __init__(self):
+        self.messages_in = 0
+        self.messages_out = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.dropped = 0  # Outgoing messages discarded (slow peer, send error)
+        self.rtt = None  # Smoothed round trip time in seconds
+        self.rtt_samples = 0
+        
+        self.rates = {'messages_in': 0.0, 'messages_out': 0.0, 'bytes_in': 0.0, 'bytes_out': 0.0}
+        self.rate_time = time.monotonic()
+        self.rate_totals = self._totals()
+    
+    def record_in(self, nbytes, messages=0):
+        self.bytes_in += nbytes
+        self.messages_in += messages
+    
+    def record_out(self, nbytes, messages=0):
+        self.bytes_out += nbytes
+        self.messages_out += messages
+    
+    def record_rtt(self, sample):
+        """Fold an RTT sample into the average and return the new average"""
+        self.rtt_samples += 1
+        if self.rtt is None:
+            self.rtt = sample
+        else:
+            self.rtt = self.rtt * (1 - RTT_SMOOTHING) + sample * RTT_SMOOTHING
+        return self.rtt
+    
+    def _totals(self):
+        return (self.messages_in, self.messages_out, self.bytes_in, self.bytes_out)
+    
+    def update_rates(self, now=None, force=False):
+        """Recompute the per-second rates if at least RATE_WINDOW has passed"""
+        if now is None:
+            now = time.monotonic()
+        elapsed = now - self.rate_time
+        if elapsed <= 0 or (elapsed < RATE_WINDOW and not force):
+            return self.rates
+        
+        totals = self._totals()
+        for name, new, old in zip(self.rates, totals, self.rate_totals):
+            self.rates[name] = (new - old) / elapsed
+        self.rate_time = now
+        self.rate_totals = totals
+        return self.rates
+    
+    def get_stats(self):
+        """Get the counters, rates and RTT as a JSON-friendly dict"""
+        return {
+            'rtt_ms': round(self.rtt * 1000, 1) if self.rtt is not None else None,
+            'messages_in': self.messages_in,
+            'messages_out': self.messages_out,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'dropped': self.dropped,
+            'messages_in_rate': round(self.rates['messages_in'], 1),
+            'messages_out_rate': round(self.rates['messages_out'], 1),
+            'bytes_in_rate': round(self.rates['bytes_in']),
+            'bytes_out_rate': round(self.rates['bytes_out'])
+        }
@@ -0,0 +1,222 @@
+import heapq
+import random
+import struct
+import threading
+import time
+from collections import deque
+
+from network.protocol import StreamDecoder, encode_json
+
+# Every datagram starts with a channel byte and a 16-bit sequence number,
+# followed by one or more protocol frames
+UDP_HEADER = struct.Struct('!BH')
+CHANNEL_UNRELIABLE = 0  # Sequenced, stale datagrams are dropped
+CHANNEL_RELIABLE = 1  # Acked and resent until acked
+CHANNEL_ACK = 2
+
+RESEND_INTERVAL = 0.1  # seconds before an unacked reliable datagram is resent
+MAX_RESENDS = 30  # Give up on a reliable datagram after this many resends
+RECENT_WINDOW = 512  # Reliable sequence numbers remembered for de-duplication
+
+# Only the newest of these matters (input packets repeat every unacked input),
+# so they never wait on a lost datagram
+UNRELIABLE_TYPES = {'position', 'state', 'state_ack', 'input', 'ping', 'pong',
+                    'snapshot', 'snapshot_ack'}
+
+def seq_newer(a, b):
+    """True if 16-bit sequence number a comes after b (with wraparound)"""
+    diff = (a - b) & 0xFFFF
+    return 0 < diff < 0x8000
+
+class UdpPeer:
+    """Sequencing, ack and resend state for one end of a UDP conversation
+
+    sendto is called as sendto(datagram, address). State-only traffic goes on
+    the unreliable channel; everything else (bullets, game over, disconnect,
+    handshake) goes on the reliable one.
+    """
+    def __init__(self, sendto, address=None, encode=encode_json):
+        self.sendto = sendto
+        self.address = address
+        self.encode = encode
+        self.lock = threading.Lock()
+        self.last_heard = time.monotonic()
+        
+        self.unreliable_seq = 0
+        self.last_unreliable = None
+        self.reliable_seq = 0
+        self.unacked = {}  # seq -> [datagram, last sent, resends]
+        self.recent = deque()
+        self.recent_set = set()
+        
+        # Counters
+        self.stale_dropped = 0
+        self.duplicates = 0
+        self.resent = 0
+        self.failed = 0
+        self.malformed = 0
+    
+    def send(self, message):
+        """Send a message on the channel its type calls for"""
+        if message.get('type') == 'state' and message.get('events'):
+            # Position rides the unreliable channel, the events must arrive
+            if 'x' in message:
+                position = {key: message[key] for key in ('seq', 'x', 'y') if key in message}
+                self.send_unreliable({'type': 'state', **position})
+            self.send_reliable({'type': 'state', 'events': message['events']})
+        elif message.get('type') in UNRELIABLE_TYPES:
+            self.send_unreliable(message)
+        else:
+            self.send_reliable(message)
+    
+    def send_unreliable(self, message):
+        with self.lock:
+            self.unreliable_seq = (self.unreliable_seq + 1) & 0xFFFF
+            seq = self.unreliable_seq
+        self.sendto(UDP_HEADER.pack(CHANNEL_UNRELIABLE, seq) + self.encode(message), self.address)
+    
+    def send_reliable(self, message):
+        with self.lock:
+            seq = self.reliable_seq
+            self.reliable_seq = (self.reliable_seq + 1) & 0xFFFF
+            datagram = UDP_HEADER.pack(CHANNEL_RELIABLE, seq) + self.encode(message)
+            self.unacked[seq] = [datagram, time.monotonic(), 0]
+        self.sendto(datagram, self.address)
+    
+    def receive(self, datagram):
+        """Process one datagram and return the messages to deliver"""
+        if len(datagram) < UDP_HEADER.size:
+            return []
+        channel, seq = UDP_HEADER.unpack_from(datagram)
+        payload = datagram[UDP_HEADER.size:]
+        self.last_heard = time.monotonic()
+        
+        if channel == CHANNEL_ACK:
+            with self.lock:
+                self.unacked.pop(seq, None)
+            return []
+        
+        if channel == CHANNEL_UNRELIABLE:
+            with self.lock:
+                if self.last_unreliable is not None and not seq_newer(seq, self.last_unreliable):
+                    self.stale_dropped += 1
+                    return []
+                self.last_unreliable = seq
+            return self._decode(payload)
+        
+        if channel == CHANNEL_RELIABLE:
+            # Always ack, the previous ack may have been the one that got lost
+            self.sendto(UDP_HEADER.pack(CHANNEL_ACK, seq), self.address)
+            with self.lock:
+                if seq in self.recent_set:
+                    self.duplicates += 1
+                    return []
+                if len(self.recent) >= RECENT_WINDOW:
+                    self.recent_set.discard(self.recent.popleft())
+                self.recent.append(seq)
+                self.recent_set.add(seq)
+            return self._decode(payload)
+        
+        return []
+    
+    def _decode(self, payload):
+        """Decode the frames in one datagram, counting bad or truncated ones"""
+        decoder = StreamDecoder()
+        messages = decoder.feed(payload)
+        self.malformed += decoder.malformed + (1 if decoder.pending() else 0)
+        return messages
+    
+    def resend(self, now=None):
+        """Resend reliable datagrams that haven't been acked in time"""
+        if now is None:
+            now = time.monotonic()
+        due = []
+        with self.lock:
+            for seq, entry in list(self.unacked.items()):
+                if now - entry[1] < RESEND_INTERVAL:
+                    continue
+                if entry[2] >= MAX_RESENDS:
+                    del self.unacked[seq]
+                    self.failed += 1
+                    continue
+                entry[1] = now
+                entry[2] += 1
+                self.resent += 1
+                due.append(entry[0])
+        for datagram in due:
+            self.sendto(datagram, self.address)
+    
+    def get_stats(self):
+        """Get channel counters"""
+        return {
+            'unacked': len(self.unacked),
+            'stale_dropped': self.stale_dropped,
+            'duplicates': self.duplicates,
+            'resent': self.resent,
+            'failed': self.failed,
+            'malformed': self.malformed
+        }
+
+class LossyLink:
+    """Wraps a send callable with simulated loss, latency and jitter
+
+    For loopback testing only. schedule(delay, callback) defaults to a timer
+    thread; pass loop.call_later when wrapping an asyncio transport.
+    """
+    def __init__(self, send, loss=0.0, latency=0.0, jitter=0.0, seed=None, schedule=None):
+        self.send = send
+        self.loss = loss
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.schedule = schedule or self._schedule_thread
+        self.dropped = 0
+        self.delivered = 0
+        
+        # Timer thread state
+        self.queue = []
+        self.counter = 0
+        self.condition = threading.Condition()
+        self.thread = None
+    
+    def __call__(self, data, address):
+        if self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        
+        delay = self.latency + self.rng.uniform(0, self.jitter)
+        if delay <= 0:
+            self._deliver(data, address)
+        else:
+            self.schedule(delay, lambda: self._deliver(data, address))
+    
+    def _deliver(self, data, address):
+        self.delivered += 1
+        try:
+            self.send(data, address)
+        except OSError:
+            pass  # Socket closed while the datagram was "in flight"
+    
+    def _schedule_thread(self, delay, callback):
+        """Run callback after delay on one background thread"""
+        with self.condition:
+            self.counter += 1
+            heapq.heappush(self.queue, (time.monotonic() + delay, self.counter, callback))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run)
+                self.thread.daemon = True
+                self.thread.start()
+            self.condition.notify()
+    
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.queue:
+                    self.condition.wait()
+                due, _, callback = self.queue[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self.condition.wait(wait)
+                    continue
+                heapq.heappop(self.queue)
+            callback()
@@ -34,19 +34,39 @@ fi
 echo "Activating virtual environment..."
 source venv/bin/activate
 
-# Install or upgrade pip
-echo "Upgrading pip..."
-pip install --upgrade pip
-
-# Clean up the requirements file by removing tkinter (it's a system package)
-echo "Fixing requirements file..."
-TEMP_REQUIREMENTS=$(mktemp)
-grep -v "^tkinter$" requirements.txt > "$TEMP_REQUIREMENTS"
-
-# Install required packages
-echo "Installing required packages..."
-pip install -r "$TEMP_REQUIREMENTS"
-rm "$TEMP_REQUIREMENTS"
+# Install packages only when the requirements changed since the last run
+REQUIREMENTS_STAMP="venv/.requirements.sha256"
+REQUIREMENTS_HASH=$(python3 -c "import hashlib; print(hashlib.sha256(open('requirements.txt', 'rb').read()).hexdigest())")
+if [ -f "$REQUIREMENTS_STAMP" ] && [ "$(cat "$REQUIREMENTS_STAMP")" = "$REQUIREMENTS_HASH" ]; then
+    echo "Packages up to date."
+else
+    # Install or upgrade pip
+    echo "Upgrading pip..."
+    pip install --upgrade pip
+    
+    # Clean up the requirements file by removing tkinter (it's a system package)
+    echo "Fixing requirements file..."
+    TEMP_REQUIREMENTS=$(mktemp)
+    grep -v "^tkinter$" requirements.txt > "$TEMP_REQUIREMENTS"
+    
+    # Install required packages
+    echo "Installing required packages..."
+    pip install -r "$TEMP_REQUIREMENTS"
+    INSTALL_STATUS=$?
+    rm "$TEMP_REQUIREMENTS"
+    
+    # Install missing Python packages explicitly
+    echo "Installing critical packages..."
+    pip install pillow pygame python-dotenv flask flask-socketio || INSTALL_STATUS=1
+    
+    # Only skip the next install if both of these worked
+    if [ $INSTALL_STATUS -eq 0 ]; then
+        echo "$REQUIREMENTS_HASH" > "$REQUIREMENTS_STAMP"
+    else
+        rm -f "$REQUIREMENTS_STAMP"
+        echo "Warning: some packages failed to install, they will be retried on the next run."
+    fi
+fi
 
 # Make sure tkinter is installed (system package)
 if ! python3 -c "import tkinter" &> /dev/null; then
@@ -72,11 +92,7 @@ if ! python3 -c "import tkinter" &> /dev/null; then
     fi
 fi
 
-# Install missing Python packages explicitly
-echo "Installing critical packages..."
-pip install pillow pygame python-dotenv flask flask-socketio
-
-# Create game assets if needed
+# Create game assets if needed (only missing or changed ones are generated)
 echo "Creating game assets if needed..."
 python3 create_assets.py
 
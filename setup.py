@@ -9,6 +9,9 @@ setup(
         "pygame>=2.0.0",
         "pillow>=8.0.0",
     ],
+    extras_require={
+        "numpy": ["numpy>=1.21.0"],
+    },
     python_requires=">=3.7",
     entry_points={
         "console_scripts": [